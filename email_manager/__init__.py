@@ -1,15 +1,26 @@
-from email_manager.analyzer import EmailAnalyzer
-from email_manager.database import DatabaseManager, EmailCategory
-from email_manager.gmail import GmailService
-from email_manager.manager import EmailManager
-from email_manager.models import EmailContent, EmailAnalysis
-
-__all__ = [
-    'EmailAnalyzer',
-    'DatabaseManager',
-    'EmailCategory',
-    'GmailService',
-    'EmailManager',
-    'EmailContent',
-    'EmailAnalysis'
-]
\ No newline at end of file
+import importlib
+
+# Public names are imported on first access (PEP 562) so that importing the
+# package, e.g. for ``python -m email_manager --help``, doesn't load the
+# Anthropic, Google API and SQLAlchemy SDKs up front.
+_LAZY_IMPORTS = {
+    'EmailAnalyzer': 'email_manager.analyzer',
+    'DatabaseManager': 'email_manager.database',
+    'EmailCategory': 'email_manager.database',
+    'GmailService': 'email_manager.gmail',
+    'EmailManager': 'email_manager.manager',
+    'EmailContent': 'email_manager.models',
+    'EmailAnalysis': 'email_manager.models'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -4,11 +4,7 @@ import argparse
 import sys
 from typing import Optional
 
-from email_manager.analyzer import EmailAnalyzer
-from email_manager.database import DatabaseManager
-from email_manager.gmail.service import GmailService
 from email_manager.logger import get_logger
-from email_manager.manager import EmailManager
 
 logger = get_logger(__name__)
 
@@ -29,6 +25,11 @@ def parse_args() -> argparse.Namespace:
         default=3,
         help='Maximum number of retry attempts for failed operations (default: 3)'
     )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Keep processing batches until no unread emails are left'
+    )
     return parser.parse_args()
 
 def main() -> Optional[int]:
@@ -36,6 +37,9 @@ def main() -> Optional[int]:
     try:
         args = parse_args()
         
+        # Heavy SDK imports are deferred until the arguments are parsed
+        from email_manager.database import DatabaseManager
+        
         # Initialize database first to check tables
         db_manager = DatabaseManager()
         if not db_manager.check_tables_exist():
@@ -51,6 +55,12 @@ For development setup, you can also use:
 This will initialize the database with the required schema.
             """)
             return 1
+        db_manager.ensure_history_partitions()
+        
+        # Only load the Anthropic and Google SDKs once the database is ready
+        from email_manager.analyzer import EmailAnalyzer
+        from email_manager.gmail.service import GmailService
+        from email_manager.manager import EmailManager
         
         # Initialize other services
         gmail_service = GmailService()
@@ -65,10 +75,17 @@ This will initialize the database with the required schema.
         
         # Process emails
         logger.info(f"Starting email processing with batch size: {args.batch_size}")
-        email_manager.process_unread_emails(
-            batch_size=args.batch_size,
-            max_retries=args.max_retries
-        )
+        if args.all:
+            processed = email_manager.process_all_unread_emails(
+                batch_size=args.batch_size,
+                max_retries=args.max_retries
+            )
+            logger.info("Processed %d emails", processed)
+        else:
+            email_manager.process_unread_emails(
+                batch_size=args.batch_size,
+                max_retries=args.max_retries
+            )
         logger.info("Email processing completed successfully")
         return 0
         
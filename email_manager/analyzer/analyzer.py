@@ -1,42 +1,136 @@
-import json
-from typing import Optional
-import logging
+import asyncio
+import atexit
+import re
+import threading
+from datetime import timedelta
+from typing import ClassVar, List, Optional
 
 import anthropic
-from anthropic import Anthropic, APIError, APIConnectionError, RateLimitError
+import httpx
+import orjson
+from anthropic import Anthropic, AsyncAnthropic, APIError, APIConnectionError, RateLimitError
 
 from ..config import config
 from ..logger import get_logger
 from ..models import EmailAnalysis, EmailContent
 from ..database.models import EmailCategory
+from .cache import AnalysisCache
 from .models import ClaudeAPIError, InsufficientCreditsError
-from .prompts import get_analysis_prompt, get_summary_prompt
+from .prompts import (
+    ANALYSIS_TOOL,
+    BATCH_ANALYSIS_TOOL,
+    get_analysis_prompt,
+    get_analysis_system_prompt,
+    get_analysis_tool_options,
+    get_batch_analysis_prompt,
+    get_batch_analysis_system_prompt,
+    get_batch_analysis_tool_options,
+    get_summary_prompt,
+    get_summary_system_prompt,
+)
 from ..database.manager import DatabaseManager  # Import DatabaseManager
 
 logger = get_logger(__name__)
-logger.setLevel(logging.DEBUG)  # Set logger level to DEBUG
+
+# Output token budgets. Analysis responses are a compact classification plus, for
+# emails that are saved, at most nine short summary bullet points.
+SUMMARY_MAX_TOKENS = 400
+ANALYSIS_MAX_TOKENS = 120 + SUMMARY_MAX_TOKENS
+BATCH_TOKENS_PER_EMAIL = 250
+MAX_BATCH_TOKENS = 8192
+
+# Number of analysis results kept in memory for repeated emails, and how long
+# persisted results are reused
+ANALYSIS_CACHE_SIZE = 4096
+ANALYSIS_CACHE_TTL = timedelta(days=7)
+
+# Bulk marketing senders. Newsletters and noreply addresses are deliberately not
+# matched since tech newsletters and GitHub notifications should be saved.
+MARKETING_SENDER_PATTERN = re.compile(
+    r'(marketing|promo|deals|offers|sales)[^@]*@|@[^>]*(mailchimp|mcsv\.net|sendgrid|klaviyo)',
+    re.IGNORECASE
+)
+
+# Tool category values mapped to their enum members
+_CATEGORY_BY_NAME = {name.lower(): member for name, member in EmailCategory.__members__.items()}
+
+# Connection pool settings shared by the Claude HTTP clients
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=32)
+HTTP_TIMEOUT = 30.0
 
 class EmailAnalyzer:
     """Analyzes emails using Claude API to determine category and generate summaries."""
 
-    def __init__(self, claude_client: Optional[Anthropic] = None, db_manager: Optional[DatabaseManager] = None):
-        """Initialize the analyzer with optional Claude client and database manager."""
+    # Sync Claude client shared by every analyzer, so workers reuse the same
+    # HTTP/2 connections and TLS sessions
+    _client: ClassVar[Optional[Anthropic]] = None
+    _client_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, claude_client: Optional[Anthropic] = None, db_manager: Optional[DatabaseManager] = None,
+                 async_claude_client: Optional[AsyncAnthropic] = None):
+        """Initialize the analyzer with optional Claude clients and database manager."""
         if claude_client:
             self.client = claude_client
         else:
-            self.client = Anthropic(api_key=config.claude.api_key)
+            self.client = self._get_client()
+        self._async_client = async_claude_client
             
         self.model = config.claude.model
+        self.triage_model = config.claude.triage_model
+        self.summary_model = config.claude.summary_model
         self._credits_exhausted = False
         
         if db_manager:
             self.db_manager = db_manager
         else:
             self.db_manager = DatabaseManager()
+        
+        # Results depend on the model, so it is part of the cache key
+        self.cache = AnalysisCache(
+            ANALYSIS_CACHE_SIZE,
+            namespace=self.triage_model,
+            db_manager=self.db_manager,
+            ttl=ANALYSIS_CACHE_TTL
+        )
+
+    @classmethod
+    def _get_client(cls) -> Anthropic:
+        """Return the shared sync Claude client, creating it on first use."""
+        if cls._client is None:
+            with cls._client_lock:
+                if cls._client is None:
+                    http_client = httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+                    atexit.register(http_client.close)
+                    cls._client = Anthropic(api_key=config.claude.api_key, http_client=http_client)
+        return cls._client
+
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        """Async Claude client, created on first use."""
+        if self._async_client is None:
+            # Async connections are bound to the event loop that opened them, so
+            # the async pool is per analyzer rather than process-wide; call
+            # aclose before the loop closes
+            self._async_client = AsyncAnthropic(
+                api_key=config.claude.api_key,
+                http_client=httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+            )
+        return self._async_client
+
+    async def aclose(self) -> None:
+        """Close the async Claude client and its connections, if one was opened."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
 
     def analyze_email(self, email: EmailContent) -> EmailAnalysis:
         """Analyze email content using Claude to determine category and generate summary if needed."""
         try:
+            # Skip Claude for obvious marketing mail and emails analyzed earlier in this process
+            cached = self._cached_analysis(email)
+            if cached is not None:
+                return cached
+
             # If credits are already known to be exhausted, fail fast
             if self._credits_exhausted:
                 logger.error("Credits already exhausted, failing fast")
@@ -44,162 +138,368 @@ class EmailAnalyzer:
 
             # Get initial analysis
             analysis_prompt = get_analysis_prompt(email)
-            logger.debug(f"Sending analysis prompt for email: {email.subject}")
+            logger.debug("Sending analysis prompt for email: %s", email.subject)
             
             response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
-                messages=[{"role": "user", "content": analysis_prompt}]
+                model=self.triage_model,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                system=get_analysis_system_prompt(),
+                messages=[{"role": "user", "content": analysis_prompt}],
+                **get_analysis_tool_options()
             )
-            
-            # Debug log the raw response
-            # logger.debug(f"Raw Claude response type: {type(response)}")
-            logger.debug(f"Raw Claude response: {response}")
-            logger.debug(f"Response content type: {type(response.content)}")
-            logger.debug(f"Response content: {response.content}")
-            
-            # Get the first message content
-            response_text = response.content[0].text if isinstance(response.content, list) else response.content
-            logger.debug(f"Extracted response text: {response_text}")
+            logger.debug("Raw Claude response: %r", response)
             
             # Parse analysis response
-            analysis = self._parse_analysis_response(response_text)
+            analysis = self._parse_analysis_response(response)
             if analysis:
                 # Record successful analysis
-                self.db_manager.add_processing_history(
-                    email_id=email.email_id,
-                    action="analyzed",
-                    category=analysis.category,
-                    confidence=analysis.confidence,
-                    success=True,
-                    reasoning=analysis.reasoning
-                )
+                self.cache.put(email, analysis)
+                self._record_analysis(email, analysis, success=True)
                 return analysis
             
             # If parsing failed, return default result
-            error_result = EmailAnalysis(
-                category=EmailCategory.IMPORTANT,
-                confidence=0.0,
-                error_message="Failed to parse response as JSON",
-                reasoning="Error occured."
-            )
+            error_result = self._parse_error_result()
             
             # Record failed analysis
-            self.db_manager.add_processing_history(
-                email_id=email.email_id,
-                action="analyzed",
-                category=error_result.category,
-                confidence=error_result.confidence,
-                success=False,
-                error_message=error_result.error_message,
-                reasoning=error_result.reasoning
-            )
+            self._record_analysis(email, error_result, success=False)
             return error_result
             
         except APIError as e:
-            error_message = str(e)
-            
-            # Check for insufficient credits error
-            if 'credit balance is too low' in error_message.lower():
-                self._credits_exhausted = True
-                logger.error("Claude API credits exhausted. Please recharge your account.")
-                raise InsufficientCreditsError("Claude API credits are exhausted") from e
-            
-            # Handle other API errors
-            logger.error(f"Claude API error: {error_message}")
-            error_result = EmailAnalysis(
-                category=EmailCategory.IMPORTANT,
-                confidence=0.0,
-                error_message=str(e),
-                reasoning="API Error occurred during analysis"
-            )
-            
-            try:
-                # Try to record the error
-                self.db_manager.add_processing_history(
-                    email_id=email.email_id,
-                    action="analyzed",
-                    category=error_result.category,
-                    confidence=error_result.confidence,
-                    success=False,
-                    error_message=error_result.error_message,
-                    reasoning=error_result.reasoning
-                )
-            except Exception as db_error:
-                logger.error(f"Failed to record analysis error: {db_error}")
-                
+            error_result = self._api_error_result(e)
+            self._record_analysis_error(email, error_result)
             return error_result
             
         except Exception as e:
-            error_msg = str(e)
-            logger.error(f"Error analyzing email: {error_msg}")
-            
-            error_result = EmailAnalysis(
-                category=EmailCategory.IMPORTANT,
-                confidence=0.0,
-                error_message=f"Error during analysis: {error_msg}",
-                reasoning="General error occurred during analysis"
-            )
-            
-            try:
-                # Try to record the error
-                self.db_manager.add_processing_history(
-                    email_id=email.email_id,
-                    action="analyzed",
-                    category=error_result.category,
-                    confidence=error_result.confidence,
-                    success=False,
-                    error_message=error_result.error_message,
-                    reasoning=error_result.reasoning
-                )
-            except Exception as db_error:
-                logger.error(f"Failed to record analysis error: {db_error}")
-                
+            error_result = self._general_error_result(e)
+            self._record_analysis_error(email, error_result)
             return error_result
 
-    def _parse_analysis_response(self, response: str) -> Optional[EmailAnalysis]:
-        """Parse Claude's JSON response into EmailAnalysis object."""
+    async def analyze_email_async(self, email: EmailContent) -> EmailAnalysis:
+        """Analyze an email using the async Claude client.
+        
+        Raises:
+            InsufficientCreditsError: If API credits are exhausted
+        """
+        # The cache may query the database, so keep it off the event loop
+        cached = await asyncio.to_thread(self._local_analysis, email)
+        if cached is not None:
+            await asyncio.to_thread(self._record_analysis, email, cached, True)
+            return cached
+
+        # If credits are already known to be exhausted, fail fast
+        if self._credits_exhausted:
+            logger.error("Credits already exhausted, failing fast")
+            raise InsufficientCreditsError("Claude API credits are exhausted")
+
+        logger.debug("Sending async analysis prompt for email: %s", email.subject)
         try:
-            logger.debug(f"Starting to parse response: {response}")
+            response = await self.async_client.messages.create(
+                model=self.triage_model,
+                max_tokens=ANALYSIS_MAX_TOKENS,
+                system=get_analysis_system_prompt(),
+                messages=[{"role": "user", "content": get_analysis_prompt(email)}],
+                **get_analysis_tool_options()
+            )
+            analysis = self._parse_analysis_response(response)
+        except APIError as e:
+            error_result = self._api_error_result(e)
+            await asyncio.to_thread(self._record_analysis_error, email, error_result)
+            return error_result
+        except Exception as e:
+            error_result = self._general_error_result(e)
+            await asyncio.to_thread(self._record_analysis_error, email, error_result)
+            return error_result
+
+        if analysis is None:
+            error_result = self._parse_error_result()
+            await asyncio.to_thread(self._record_analysis_error, email, error_result)
+            return error_result
+
+        await asyncio.to_thread(self.cache.put, email, analysis)
+        await asyncio.to_thread(self._record_analysis, email, analysis, True)
+        return analysis
+
+    async def analyze_emails_async(self, emails: List[EmailContent],
+                                   max_concurrency: Optional[int] = None) -> List[Optional[EmailAnalysis]]:
+        """Analyze emails concurrently, keeping up to max_concurrency requests in flight.
+        
+        A semaphore gives a sliding window: a new request starts as soon as any
+        in-flight one finishes rather than waiting for a whole batch.
+        
+        Returns:
+            A list aligned with ``emails``. An entry is None if its analysis
+            raised unexpectedly.
             
-            # Parse JSON response
-            data = json.loads(response)
-            logger.debug(f"Parsed JSON data: {data}")
+        Raises:
+            InsufficientCreditsError: If API credits are exhausted
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or config.claude.max_concurrency)
+
+        async def bounded(email: EmailContent) -> EmailAnalysis:
+            async with semaphore:
+                return await self.analyze_email_async(email)
+
+        results = await asyncio.gather(*(bounded(email) for email in emails), return_exceptions=True)
+
+        analyses: List[Optional[EmailAnalysis]] = []
+        for email, result in zip(emails, results):
+            if isinstance(result, InsufficientCreditsError):
+                raise result
+            if isinstance(result, BaseException):
+                logger.error("Async analysis failed for email %s: %s", email.email_id, result)
+                analyses.append(None)
+            else:
+                analyses.append(result)
+        return analyses
+
+    def _fast_classify(self, email: EmailContent) -> Optional[EmailAnalysis]:
+        """Classify obvious marketing mail locally, or return None if Claude is needed."""
+        if not MARKETING_SENDER_PATTERN.search(email.sender):
+            return None
+        if 'unsubscribe' not in email.content.lower():
+            return None
+        return EmailAnalysis(
+            category=EmailCategory.NON_ESSENTIAL,
+            confidence=0.9,
+            reasoning="heuristic: marketing"
+        )
+
+    def _local_analysis(self, email: EmailContent) -> Optional[EmailAnalysis]:
+        """Analyze an email without calling Claude, using heuristics or the cache."""
+        analysis = self._fast_classify(email) or self.cache.get(email)
+        if analysis is not None:
+            logger.debug("Skipping Claude for email: %s (%s)", email.subject, analysis.reasoning)
+        return analysis
+
+    def _cached_analysis(self, email: EmailContent) -> Optional[EmailAnalysis]:
+        """Return and record a local analysis for an email, or None if Claude is needed."""
+        cached = self._local_analysis(email)
+        if cached is None:
+            return None
+        try:
+            self._record_analysis(email, cached, success=True)
+        except Exception as db_error:
+            logger.error("Failed to record analysis for %s: %s", email.email_id, db_error)
+        return cached
+
+    def _parse_error_result(self) -> EmailAnalysis:
+        """Result used when Claude's response could not be parsed."""
+        return EmailAnalysis(
+            category=EmailCategory.IMPORTANT,
+            confidence=0.0,
+            error_message="Failed to parse response as JSON",
+            reasoning="Error occured."
+        )
+
+    def _api_error_result(self, e: APIError) -> EmailAnalysis:
+        """Result for a Claude API error, raising if credits are exhausted."""
+        error_message = str(e)
+        
+        # Check for insufficient credits error
+        if 'credit balance is too low' in error_message.lower():
+            self._credits_exhausted = True
+            logger.error("Claude API credits exhausted. Please recharge your account.")
+            raise InsufficientCreditsError("Claude API credits are exhausted") from e
+        
+        # Handle other API errors
+        logger.error("Claude API error: %s", error_message)
+        return EmailAnalysis(
+            category=EmailCategory.IMPORTANT,
+            confidence=0.0,
+            error_message=error_message,
+            reasoning="API Error occurred during analysis"
+        )
+
+    def _general_error_result(self, e: Exception) -> EmailAnalysis:
+        """Result for an unexpected error during analysis."""
+        error_msg = str(e)
+        logger.error("Error analyzing email: %s", error_msg)
+        return EmailAnalysis(
+            category=EmailCategory.IMPORTANT,
+            confidence=0.0,
+            error_message=f"Error during analysis: {error_msg}",
+            reasoning="General error occurred during analysis"
+        )
+
+    def _history_record(self, email: EmailContent, analysis: EmailAnalysis, success: bool) -> dict:
+        """Build the processing history fields for an analysis result."""
+        return dict(
+            email_id=email.email_id,
+            action="analyzed",
+            category=analysis.category,
+            confidence=analysis.confidence,
+            success=success,
+            error_message=analysis.error_message,
+            reasoning=analysis.reasoning
+        )
+
+    def _record_analysis(self, email: EmailContent, analysis: EmailAnalysis, success: bool) -> None:
+        """Record an analysis result in the processing history."""
+        self.db_manager.add_processing_history(**self._history_record(email, analysis, success))
+
+    def _record_analysis_error(self, email: EmailContent, error_result: EmailAnalysis) -> None:
+        """Try to record a failed analysis without masking the original error."""
+        try:
+            self._record_analysis(email, error_result, success=False)
+        except Exception as db_error:
+            logger.error("Failed to record analysis error: %s", db_error)
+
+    def analyze_emails(self, emails: List[EmailContent]) -> List[Optional[EmailAnalysis]]:
+        """Analyze a batch of emails with a single Claude request.
+        
+        Args:
+            emails: The emails to analyze
             
-            # Validate required fields
-            if not isinstance(data, dict):
-                logger.error("Response is not a JSON object")
-                return None
-                
-            if "category" not in data or "confidence" not in data or "reasoning" not in data:
-                logger.error(f"Missing required fields in JSON response. Available fields: {data.keys()}")
-                return None
-                
-            # Convert category string to enum
-            try:
-                category = EmailCategory[data["category"].upper()]
-            except KeyError:
-                logger.error(f"Invalid category from Claude: {data['category']}")
-                return None
-                
-            # Extract confidence and reasoning
-            confidence = float(data.get("confidence", 0.0))
-            reasoning = data.get("reasoning", "")
+        Returns:
+            A list aligned with ``emails``. An entry is None when the batched
+            response did not contain a usable result for that email, in which
+            case the caller should fall back to analyze_email for it.
             
-            return EmailAnalysis(
-                category=category,
-                confidence=confidence,
-                reasoning=reasoning
+        Raises:
+            InsufficientCreditsError: If API credits are exhausted
+        """
+        if not emails:
+            return []
+
+        # History rows for the whole batch are written with a single insert
+        history = []
+        try:
+            # Heuristics first, then one cache lookup for the rest of the batch
+            results = [self._fast_classify(email) for email in emails]
+            unclassified = [index for index, analysis in enumerate(results) if analysis is None]
+            cached = self.cache.get_many([emails[index] for index in unclassified])
+            for index, analysis in zip(unclassified, cached):
+                results[index] = analysis
+            for email, analysis in zip(emails, results):
+                if analysis is not None:
+                    history.append(self._history_record(email, analysis, success=True))
+
+            misses = [index for index, analysis in enumerate(results) if analysis is None]
+            if misses:
+                fresh = self._analyze_batch([emails[index] for index in misses], history)
+                for index, analysis in zip(misses, fresh):
+                    results[index] = analysis
+            return results
+        finally:
+            self._flush_history(history)
+
+    def _analyze_batch(self, emails: List[EmailContent], history: List[dict]) -> List[Optional[EmailAnalysis]]:
+        """Send emails that missed the cache to Claude in a single request."""
+        if len(emails) == 1:
+            return [self.analyze_email(emails[0])]
+
+        # If credits are already known to be exhausted, fail fast
+        if self._credits_exhausted:
+            logger.error("Credits already exhausted, failing fast")
+            raise InsufficientCreditsError("Claude API credits are exhausted")
+
+        try:
+            logger.debug("Sending batch analysis prompt for %s emails", len(emails))
+            response = self.client.messages.create(
+                model=self.triage_model,
+                max_tokens=min(MAX_BATCH_TOKENS, BATCH_TOKENS_PER_EMAIL * len(emails)),
+                system=get_batch_analysis_system_prompt(),
+                messages=[{"role": "user", "content": get_batch_analysis_prompt(emails)}],
+                **get_batch_analysis_tool_options()
             )
+            results = self._parse_batch_analysis_response(response, len(emails))
+
+        except APIError as e:
+            error_message = str(e)
+            if 'credit balance is too low' in error_message.lower():
+                self._credits_exhausted = True
+                logger.error("Claude API credits exhausted. Please recharge your account.")
+                raise InsufficientCreditsError("Claude API credits are exhausted") from e
+            logger.error("Claude API error during batch analysis: %s", error_message)
+            return [None] * len(emails)
+
+        except Exception as e:
+            logger.error("Error during batch analysis: %s", e)
+            return [None] * len(emails)
+
+        analyzed = [(email, analysis) for email, analysis in zip(emails, results) if analysis is not None]
+        self.cache.put_many(analyzed)
+        for email, analysis in analyzed:
+            history.append(self._history_record(email, analysis, success=True))
+
+        return results
+
+    def _flush_history(self, history: List[dict]) -> None:
+        """Write accumulated analysis history without failing the batch."""
+        if not history:
+            return
+        try:
+            self.db_manager.add_processing_history_bulk(history)
+        except Exception as db_error:
+            logger.error("Failed to record analysis history for %d emails: %s", len(history), db_error)
+
+    def _tool_input(self, response, tool_name: str) -> Optional[dict]:
+        """Return the input Claude passed to the named tool, or None if it wasn't called."""
+        for block in response.content:
+            if getattr(block, "type", None) == "tool_use" and block.name == tool_name:
+                if isinstance(block.input, dict):
+                    return block.input
+        logger.error("Claude response did not call the %s tool", tool_name)
+        return None
+
+    def _parse_batch_analysis_response(self, response, count: int) -> List[Optional[EmailAnalysis]]:
+        """Parse Claude's batched tool call into a list aligned by email index."""
+        results: List[Optional[EmailAnalysis]] = [None] * count
+        data = self._tool_input(response, BATCH_ANALYSIS_TOOL["name"])
+        if data is None or not isinstance(data.get("results"), list):
+            logger.error("Invalid batch analysis response format")
+            return results
+
+        for item in data["results"]:
+            if not isinstance(item, dict):
+                continue
+            index = item.get("i")
+            if not isinstance(index, int) or not 0 <= index < count:
+                logger.error("Invalid email index in batch response: %s", index)
+                continue
+            results[index] = self._analysis_from_data(item)
+
+        return results
+
+    def _parse_analysis_response(self, response) -> Optional[EmailAnalysis]:
+        """Parse Claude's classify_email tool call into EmailAnalysis object."""
+        data = self._tool_input(response, ANALYSIS_TOOL["name"])
+        if data is None:
+            return None
+        logger.debug("Classification tool input: %s", data)
+        return self._analysis_from_data(data)
+
+    def _analysis_from_data(self, data: dict) -> Optional[EmailAnalysis]:
+        """Build an EmailAnalysis from a parsed result object."""
+        if "c" not in data or "p" not in data or "r" not in data:
+            logger.error("Missing required fields in JSON response. Available fields: %s", data.keys())
+            return None
             
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {str(e)}")
-            logger.debug(f"Raw response: {response}")
+        # Convert category string to enum
+        category = _CATEGORY_BY_NAME.get(data["c"]) if isinstance(data["c"], str) else None
+        if category is None:
+            logger.error("Invalid category from Claude: %s", data['c'])
             return None
             
-        except Exception as e:
-            logger.error(f"Error parsing response: {str(e)}")
+        # Extract confidence and reasoning
+        try:
+            confidence = float(data["p"])
+        except (TypeError, ValueError):
+            logger.error("Invalid confidence from Claude: %s", data['p'])
             return None
+        reasoning = data["r"] or ""
+        
+        # Summary points are only requested for emails that are saved
+        summary = None
+        if category == EmailCategory.SAVE_AND_SUMMARIZE and isinstance(data.get("s"), list) and data["s"]:
+            summary = self._format_summary_points(data["s"])
+        
+        return EmailAnalysis(
+            category=category,
+            confidence=confidence,
+            reasoning=reasoning,
+            summary=summary
+        )
 
     def generate_summary(self, email: EmailContent) -> Optional[str]:
         """Generate a summary for an email that should be saved.
@@ -223,51 +523,62 @@ class EmailAnalyzer:
 
             # Get summary
             summary_prompt = get_summary_prompt(email)
-            logger.debug(f"Sending summary prompt for email: {email.subject}")
+            logger.debug("Sending summary prompt for email: %s", email.subject)
             
             response = self.client.messages.create(
-                model=self.model,
-                max_tokens=1000,
+                model=self.summary_model,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                system=get_summary_system_prompt(),
                 messages=[{"role": "user", "content": summary_prompt}]
             )
             
             # Debug log the raw response
-            logger.debug(f"Raw summary response type: {type(response)}")
-            logger.debug(f"Raw summary response: {response}")
+            logger.debug("Raw summary response: %r", response)
             
             # Get the first message content
             response_text = response.content[0].text if isinstance(response.content, list) else response.content
-            logger.debug(f"Extracted summary text: {response_text}")
+            logger.debug("Extracted summary text: %s", response_text)
             
             # Parse summary response
-            try:
-                data = json.loads(response_text)
-                if not isinstance(data, dict) or "summary_points" not in data:
-                    logger.error("Invalid summary response format")
-                    return None
-                    
-                # Join bullet points with newlines
-                summary = "\n".join(f"• {point}" for point in data["summary_points"])
-                return summary
-                
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse summary JSON response: {str(e)}")
-                return None
+            return self._parse_summary_response(response_text)
                 
         except APIError as e:
-            error_message = str(e)
-            
-            # Check for insufficient credits error
-            if 'credit balance is too low' in error_message.lower():
-                self._credits_exhausted = True
-                logger.error("Claude API credits exhausted. Please recharge your account.")
-                raise InsufficientCreditsError("Claude API credits are exhausted") from e
-            
-            # Handle other API errors
-            logger.error(f"Claude API error generating summary: {error_message}")
-            raise ClaudeAPIError(f"Failed to generate summary: {error_message}") from e
+            raise self._summary_api_error(e) from e
             
         except Exception as e:
             error_msg = str(e)
-            logger.error(f"Error generating summary: {error_msg}")
-            raise ClaudeAPIError(f"Failed to generate summary: {error_msg}") from e
\ No newline at end of file
+            logger.error("Error generating summary: %s", error_msg)
+            raise ClaudeAPIError(f"Failed to generate summary: {error_msg}") from e
+
+    def _summary_api_error(self, e: APIError) -> ClaudeAPIError:
+        """Map a Claude API error raised while summarizing to the error to raise."""
+        error_message = str(e)
+        
+        # Check for insufficient credits error
+        if 'credit balance is too low' in error_message.lower():
+            self._credits_exhausted = True
+            logger.error("Claude API credits exhausted. Please recharge your account.")
+            return InsufficientCreditsError("Claude API credits are exhausted")
+        
+        # Handle other API errors
+        logger.error("Claude API error generating summary: %s", error_message)
+        return ClaudeAPIError(f"Failed to generate summary: {error_message}")
+
+    @staticmethod
+    def _format_summary_points(points: List[str]) -> str:
+        """Join summary points into newline-separated bullets."""
+        return "\n".join(f"• {point}" for point in points)
+
+    def _parse_summary_response(self, response: str) -> Optional[str]:
+        """Parse Claude's JSON summary response into bullet points."""
+        try:
+            data = orjson.loads(response)
+            if not isinstance(data, dict) or "summary_points" not in data:
+                logger.error("Invalid summary response format")
+                return None
+                
+            return self._format_summary_points(data["summary_points"])
+            
+        except orjson.JSONDecodeError as e:
+            logger.error("Failed to parse summary JSON response: %s", e)
+            return None
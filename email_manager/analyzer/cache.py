@@ -0,0 +1,130 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..database.manager import DatabaseManager
+from ..logger import get_logger
+from ..models import EmailAnalysis, EmailContent
+
+logger = get_logger(__name__)
+
+def analysis_cache_key(email: EmailContent, namespace: str = "") -> bytes:
+    """Hash the parts of an email (and the model analyzing it) that determine its analysis."""
+    return hashlib.blake2b(
+        f"{namespace}|{email.sender}|{email.subject}|{email.content}".encode(),
+        digest_size=16
+    ).digest()
+
+class AnalysisCache:
+    """Thread-safe LRU cache of analysis results for repeated emails.
+
+    Newsletters and notifications often arrive with identical sender, subject
+    and body, so their analysis can be reused instead of calling Claude again.
+    When a database manager is given, entries are also persisted so they
+    survive between runs, and are reused for up to ``ttl``.
+    """
+
+    def __init__(self, max_size: int = 1024, namespace: str = "",
+                 db_manager: Optional[DatabaseManager] = None, ttl: timedelta = timedelta(days=7)):
+        self.max_size = max_size
+        self.namespace = namespace
+        self.db_manager = db_manager
+        self.ttl = ttl
+        self._entries: "OrderedDict[bytes, EmailAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, email: EmailContent) -> Optional[EmailAnalysis]:
+        """Return the cached analysis for an email, or None on a miss."""
+        return self.get_many([email])[0]
+
+    def get_many(self, emails: List[EmailContent]) -> List[Optional[EmailAnalysis]]:
+        """Return cached analyses aligned with emails, with None for misses.
+        
+        Emails missing from memory are looked up in the database with one query.
+        """
+        keys = [analysis_cache_key(email, self.namespace) for email in emails]
+        results: List[Optional[EmailAnalysis]] = []
+        with self._lock:
+            for key in keys:
+                analysis = self._entries.get(key)
+                if analysis is not None:
+                    self._entries.move_to_end(key)
+                results.append(analysis)
+
+        misses = {key for key, analysis in zip(keys, results) if analysis is None}
+        if misses:
+            loaded = self._load_many(misses)
+            for key, analysis in loaded.items():
+                self._remember(key, analysis)
+            results = [analysis or loaded.get(key) for key, analysis in zip(keys, results)]
+        return results
+
+    def put(self, email: EmailContent, analysis: EmailAnalysis) -> None:
+        """Cache a successful analysis, evicting the least recently used entry if full."""
+        self.put_many([(email, analysis)])
+
+    def put_many(self, pairs: Iterable[Tuple[EmailContent, EmailAnalysis]]) -> None:
+        """Cache several successful analyses, persisting them with one statement."""
+        entries = {
+            analysis_cache_key(email, self.namespace): analysis
+            for email, analysis in pairs
+            if not analysis.error_message
+        }
+        for key, analysis in entries.items():
+            self._remember(key, analysis)
+        self._store_many(entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: bytes, analysis: EmailAnalysis) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = analysis
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _load_many(self, keys: Iterable[bytes]) -> Dict[bytes, EmailAnalysis]:
+        """Look up persisted analyses; the cache is best effort so errors are misses."""
+        if self.db_manager is None:
+            return {}
+        keys_by_hex = {key.hex(): key for key in keys}
+        try:
+            entries = self.db_manager.get_cached_analyses(list(keys_by_hex), self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to read analysis cache: {e}")
+            return {}
+        return {
+            keys_by_hex[hex_key]: EmailAnalysis(
+                category=entry.category,
+                confidence=entry.confidence,
+                reasoning=entry.reasoning or "",
+                summary=entry.summary
+            )
+            for hex_key, entry in entries.items()
+        }
+
+    def _store_many(self, entries: Dict[bytes, EmailAnalysis]) -> None:
+        if self.db_manager is None or not entries:
+            return
+        try:
+            self.db_manager.store_cached_analyses([
+                dict(
+                    key=key.hex(),
+                    category=analysis.category,
+                    confidence=analysis.confidence,
+                    reasoning=analysis.reasoning,
+                    summary=analysis.summary
+                )
+                for key, analysis in entries.items()
+            ])
+        except Exception as e:
+            logger.warning(f"Failed to write analysis cache: {e}")
@@ -1,6 +1,3 @@
-from dataclasses import dataclass
-from typing import Optional
-
 class ClaudeAPIError(Exception):
     """Base exception for Claude API errors."""
     pass
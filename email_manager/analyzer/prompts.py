@@ -1,71 +1,137 @@
-from ..models import EmailContent
-
-def get_analysis_prompt(email: EmailContent) -> str:
-    return f"""Analyze this email and determine its category. The email details are:
+from typing import Any, Dict, Final, List
 
-Subject: {email.subject}
-From: {email.sender}
-Content: {email.content}
+from ..models import EmailContent
 
-Categorize this email into one of these categories:
-1. non_essential: Advertisements, promotions, general newsletters
+# Static instructions are sent as the system prompt, separate from the email.
+# They are well under the minimum prompt length Claude caches (1024 tokens,
+# 2048 for Haiku), so they carry no cache_control marker.
+CATEGORY_RUBRIC: Final[str] = """1. non_essential: Advertisements, promotions, general newsletters
 2. save_and_summarize: Important content that should be saved and summarized based on user preferences. This includes Technical or AI-related content, including tech newsletters. Also, marketing and business newsletters, stock market updates, GitHub notifications, API updates
-3. important: Other important emails that need attention like bills, receipts, registrations, reminders, appointments, etc.
-
-IMPORTANT: Respond with ONLY a single JSON object and NO additional text. The JSON must have exactly this structure:
-{{
-    "category": "non_essential|save_and_summarize|important",
-    "confidence": 0.0-1.0,
-    "reasoning": "1-2 sentences explaining the categorization"
-}}
-
-Here are two example responses (DO NOT include these in your response, just follow the format):
-
-Example 1:
-{{
-    "category": "save_and_summarize",
-    "confidence": 0.95,
-    "reasoning": "This is a detailed update about an important project that should be saved for future reference."
-}}
-
-Example 2:
-{{
-    "category": "important",
-    "confidence": 0.97,
-    "reasoning": "This is an email about your bill from the energy company National Grid."
-}}"""
-
-def get_summary_prompt(email: EmailContent) -> str:
-    return f"""Generate a concise 1-9 bullet point summary of this important email:
-
-Subject: {email.subject}
-From: {email.sender}
-Content: {email.content}
+3. important: Other important emails that need attention like bills, receipts, registrations, reminders, appointments, etc."""
 
-Focus on:
-- Key points and main message
+SUMMARY_FOCUS: Final[str] = """- Key points and main message
 - Important updates or changes
 - Interesting or imporatant news
 - Action items or deadlines
 - Relevant links or resources
-- Critical details to remember
-
-IMPORTANT: Respond with ONLY a single JSON object and NO additional text. The JSON must have exactly this structure:
-{{
-    "summary_points": [
-        "Point 1 about key updates",
-        "Point 2 about important changes",
-        "Point 3 about action items",
-        "Point 4 about deadlines",
-        "Point 5 about resources"
-    ]
-}}
-
-Example (DO NOT include this in your response, just follow the format):
-{{
-    "summary_points": [
-        "Project deadline extended to March 15th",
-        "New requirements added for user authentication",
-        "Team meeting scheduled for next Tuesday at 2 PM"
+- Critical details to remember"""
+
+ANALYSIS_INSTRUCTIONS: Final[str] = f"""Analyze the email provided by the user and determine its category.
+
+Categorize the email into one of these categories:
+{CATEGORY_RUBRIC}
+
+If the category is save_and_summarize, also write a concise 1-9 bullet point summary of the email, focusing on:
+{SUMMARY_FOCUS}
+
+Record your answer with the classify_email tool."""
+
+SUMMARY_INSTRUCTIONS: Final[str] = f"""Generate a concise 1-9 bullet point summary of the important email provided by the user.
+
+Focus on:
+{SUMMARY_FOCUS}
+
+IMPORTANT: Respond with ONLY a single JSON object and NO additional text. Keep each point short. The JSON must have exactly this structure:
+{{"summary_points": ["Point about key updates", "Point about action items"]}}"""
+
+BATCH_ANALYSIS_INSTRUCTIONS: Final[str] = f"""Analyze each of the emails provided by the user and determine its category. Emails are separated by "---" lines and numbered with "EMAIL <index>".
+
+Categorize each email into one of these categories:
+{CATEGORY_RUBRIC}
+
+For each email categorized as save_and_summarize, also write a concise 1-9 bullet point summary, focusing on:
+{SUMMARY_FOCUS}
+
+Record your answers with the classify_emails tool, including exactly one result per email using the email's index."""
+
+# Claude is forced to answer through these tools, so the analysis always arrives as
+# structured input matching the schema instead of JSON embedded in text. Keys are
+# kept to single letters to minimise output tokens.
+_CLASSIFICATION_PROPERTIES: Final[Dict[str, Any]] = {
+    "c": {
+        "type": "string",
+        "enum": ["non_essential", "save_and_summarize", "important"],
+        "description": "The email category"
+    },
+    "p": {"type": "number", "description": "Confidence from 0.0 to 1.0"},
+    "r": {"type": "string", "description": "One sentence explaining the categorization"},
+    "s": {
+        "type": "array",
+        "items": {"type": "string"},
+        "description": "Summary bullet points. Only for save_and_summarize emails"
+    }
+}
+
+ANALYSIS_TOOL: Final[Dict[str, Any]] = {
+    "name": "classify_email",
+    "description": "Record the category of the email.",
+    "input_schema": {
+        "type": "object",
+        "properties": _CLASSIFICATION_PROPERTIES,
+        "required": ["c", "p", "r"]
+    }
+}
+
+BATCH_ANALYSIS_TOOL: Final[Dict[str, Any]] = {
+    "name": "classify_emails",
+    "description": "Record the category of each email.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "i": {"type": "integer", "description": "The email index"},
+                        **_CLASSIFICATION_PROPERTIES
+                    },
+                    "required": ["i", "c", "p", "r"]
+                }
+            }
+        },
+        "required": ["results"]
+    }
+}
+
+def _system_prompt(instructions: str) -> List[Dict[str, Any]]:
+    return [{"type": "text", "text": instructions}]
+
+def _email_details(email: EmailContent) -> List[Dict[str, Any]]:
+    return [{
+        "type": "text",
+        "text": f"Subject: {email.subject}\nFrom: {email.sender}\nContent: {email.content}"
+    }]
+
+# Built once at import time; the same block lists are sent with every request
+_ANALYSIS_SYSTEM_PROMPT: Final[List[Dict[str, Any]]] = _system_prompt(ANALYSIS_INSTRUCTIONS)
+_BATCH_ANALYSIS_SYSTEM_PROMPT: Final[List[Dict[str, Any]]] = _system_prompt(BATCH_ANALYSIS_INSTRUCTIONS)
+_SUMMARY_SYSTEM_PROMPT: Final[List[Dict[str, Any]]] = _system_prompt(SUMMARY_INSTRUCTIONS)
+
+def get_analysis_system_prompt() -> List[Dict[str, Any]]:
+    return _ANALYSIS_SYSTEM_PROMPT
+
+def get_batch_analysis_system_prompt() -> List[Dict[str, Any]]:
+    return _BATCH_ANALYSIS_SYSTEM_PROMPT
+
+def get_summary_system_prompt() -> List[Dict[str, Any]]:
+    return _SUMMARY_SYSTEM_PROMPT
+
+def get_analysis_tool_options() -> Dict[str, Any]:
+    return {"tools": [ANALYSIS_TOOL], "tool_choice": {"type": "tool", "name": ANALYSIS_TOOL["name"]}}
+
+def get_batch_analysis_tool_options() -> Dict[str, Any]:
+    return {"tools": [BATCH_ANALYSIS_TOOL], "tool_choice": {"type": "tool", "name": BATCH_ANALYSIS_TOOL["name"]}}
+
+def get_analysis_prompt(email: EmailContent) -> List[Dict[str, Any]]:
+    return _email_details(email)
+
+def get_summary_prompt(email: EmailContent) -> List[Dict[str, Any]]:
+    return _email_details(email)
+
+def get_batch_analysis_prompt(emails: List[EmailContent]) -> List[Dict[str, Any]]:
+    sections: List[str] = [
+        f"---\nEMAIL {index}\nSubject: {email.subject}\nFrom: {email.sender}\nContent: {email.content}"
+        for index, email in enumerate(emails)
     ]
-}}"""
\ No newline at end of file
+    return [{"type": "text", "text": "\n".join(sections)}]
@@ -1,15 +1,22 @@
 """
 Configuration management for the Email Manager application.
 """
+import functools
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+_DOTENV_LOADED = False
+
+def _load_dotenv() -> None:
+    """Load environment variables from the .env file once per process."""
+    global _DOTENV_LOADED
+    if not _DOTENV_LOADED:
+        load_dotenv()
+        _DOTENV_LOADED = True
 
 @dataclass
 class GmailConfig:
@@ -26,6 +33,10 @@ class GmailConfig:
                 'https://www.googleapis.com/auth/gmail.labels'
             ]
 
+def _default_pool_size() -> int:
+    """Two connections per CPU, capped so a large host doesn't exhaust max_connections."""
+    return min(16, (os.cpu_count() or 1) * 2)
+
 @dataclass
 class DatabaseConfig:
     """Database connection configuration."""
@@ -34,17 +45,29 @@ class DatabaseConfig:
     name: str
     user: str
     password: str
+    pool_size: int = field(default_factory=_default_pool_size)
+    max_overflow: int = 8
+    pool_timeout: int = 30  # Seconds to wait for a free connection
+    pool_recycle: int = 1800  # Seconds before a pooled connection is replaced
+    statement_timeout: int = 0  # Milliseconds before a statement is cancelled, 0 to disable
     
-    @property
+    @functools.cached_property
     def connection_string(self) -> str:
         """Generate SQLAlchemy connection string."""
-        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.name}"
+        return self.connection_string_for(self.name)
+
+    def connection_string_for(self, database_name: str) -> str:
+        """Generate SQLAlchemy connection string for another database on the same server."""
+        return f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{database_name}"
 
 @dataclass
 class ClaudeConfig:
     """Claude AI configuration."""
     api_key: str
     model: str
+    triage_model: str  # Cheaper, faster model used for categorization
+    summary_model: str  # Model used for summaries of saved emails
+    max_concurrency: int = 8  # Maximum in-flight requests for async analysis
 
 @dataclass
 class Config:
@@ -59,8 +82,13 @@ class Config:
     claude: ClaudeConfig
     
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def load(cls) -> 'Config':
-        """Load configuration from environment variables."""
+        """Load configuration from environment variables.
+        
+        The result is cached; use reload() to pick up environment changes.
+        """
+        _load_dotenv()
         base_dir = Path(__file__).parent.parent
         
         return cls(
@@ -78,15 +106,29 @@ class Config:
                 port=int(os.getenv('DB_PORT', '5432')),
                 name=os.getenv('DB_NAME'),
                 user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD')
+                password=os.getenv('DB_PASSWORD'),
+                pool_size=int(os.getenv('DB_POOL_SIZE') or _default_pool_size()),
+                max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '8')),
+                pool_timeout=int(os.getenv('DB_POOL_TIMEOUT', '30')),
+                pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')),
+                statement_timeout=int(os.getenv('DB_STATEMENT_TIMEOUT', '0'))
             ),
             
             claude=ClaudeConfig(
                 api_key=os.getenv('ANTHROPIC_API_KEY'),
-                model=os.getenv('CLAUDE_MODEL')
+                model=os.getenv('CLAUDE_MODEL'),
+                triage_model=os.getenv('CLAUDE_TRIAGE_MODEL', 'claude-3-haiku-20240307'),
+                summary_model=os.getenv('CLAUDE_SUMMARY_MODEL') or os.getenv('CLAUDE_MODEL'),
+                max_concurrency=int(os.getenv('CLAUDE_MAX_CONCURRENCY', '8'))
             )
         )
 
+    @classmethod
+    def reload(cls) -> 'Config':
+        """Discard the cached configuration and load it again from the environment."""
+        cls.load.cache_clear()
+        return cls.load()
+
     @property
     def ANTHROPIC_API_KEY(self) -> str:
         """Getter for Claude API key to maintain compatibility."""
@@ -1,10 +1,25 @@
-from .models import EmailCategory, DeletedEmail, SavedEmail, ProcessingHistory
-from .manager import DatabaseManager
-
-__all__ = [
-    'EmailCategory',
-    'DeletedEmail',
-    'SavedEmail',
-    'ProcessingHistory',
-    'DatabaseManager'
-]
+import importlib
+
+# Loaded on first access (PEP 562) so that importing the models, e.g. for
+# EmailCategory, doesn't also load the manager, its config and engine setup.
+_LAZY_IMPORTS = {
+    'EmailCategory': 'email_manager.database.models',
+    'DeletedEmail': 'email_manager.database.models',
+    'SavedEmail': 'email_manager.database.models',
+    'ProcessingHistory': 'email_manager.database.models',
+    'AnalysisCacheEntry': 'email_manager.database.models',
+    'DatabaseManager': 'email_manager.database.manager',
+    'AsyncDatabaseManager': 'email_manager.database.async_manager'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,248 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from ..config import config
+from ..logger import get_logger
+from .manager import (
+    _DELETED_EMAIL_BY_EMAIL_ID,
+    _FRESH_CACHED_ANALYSIS,
+    _HISTORY_BY_EMAIL_ID,
+    _INSERT_DELETED_EMAIL,
+    _INSERT_SAVED_EMAIL,
+    _SAVED_EMAIL_BY_EMAIL_ID,
+    _ensure_aware,
+)
+from .models import AnalysisCacheEntry, DeletedEmail, EmailCategory, ProcessingHistory, SavedEmail
+
+logger = get_logger(__name__)
+
+class AsyncDatabaseManager:
+    """asyncio counterpart of DatabaseManager for the write and lookup hot paths.
+
+    Database round-trips are awaited instead of blocking, so they overlap with
+    in-flight Claude and Gmail requests in async code. Connections are bound to
+    the event loop that opened them, so each manager has its own engine; call
+    ``dispose`` before the loop closes.
+    """
+
+    def __init__(self, schema: str = 'public', database_name: Optional[str] = None):
+        """Initialize the async engine and session factory
+
+        Args:
+            schema: Database schema to use (defaults to 'public')
+            database_name: Optional database name to override config
+        """
+        if database_name:
+            connection_string = config.db.connection_string_for(database_name)
+        else:
+            connection_string = config.db.connection_string
+
+        # Startup settings; include public for the pgcrypto functions
+        server_settings = {'search_path': f"{schema}, public"}
+        if config.db.statement_timeout:
+            server_settings['statement_timeout'] = str(config.db.statement_timeout)
+
+        self.engine = create_async_engine(
+            make_url(connection_string).set(drivername='postgresql+asyncpg'),
+            pool_size=config.db.pool_size,
+            max_overflow=config.db.max_overflow,
+            pool_timeout=config.db.pool_timeout,
+            pool_pre_ping=True,
+            pool_recycle=config.db.pool_recycle,
+            pool_use_lifo=True,
+            query_cache_size=1200,
+            # asyncpg prepares each statement once per connection and reuses it
+            connect_args={
+                'server_settings': server_settings,
+                'prepared_statement_cache_size': 500
+            }
+        )
+        self.SessionLocal = async_sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
+        self.schema = schema
+
+    async def dispose(self) -> None:
+        """Close all pooled connections."""
+        await self.engine.dispose()
+
+    @asynccontextmanager
+    async def get_session(self) -> AsyncIterator[AsyncSession]:
+        """Get an async database session with automatic cleanup"""
+        async with self.SessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def store_deleted_email(self, email_id: str, subject: str, sender: str,
+                                  content: Optional[str] = None) -> UUID:
+        """Store metadata for a deleted email
+
+        Args:
+            email_id: Unique identifier of the email
+            subject: Email subject
+            sender: Email sender
+            content: Optional email content for potential recovery
+
+        Returns:
+            UUID of the created record
+
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        async with self.get_session() as session:
+            result = await session.execute(_INSERT_DELETED_EMAIL, {
+                'email_id': email_id,
+                'subject': subject,
+                'sender': sender,
+                'content': content
+            })
+            return result.scalar_one()
+
+    async def archive_saved_email(self, email_id: str, subject: str, sender: str,
+                                  content: str, summary: str, received_date: datetime,
+                                  category: EmailCategory = EmailCategory.SAVE_AND_SUMMARIZE) -> UUID:
+        """Archive an email that should be saved and summarized
+
+        Args:
+            email_id: Unique identifier of the email
+            subject: Email subject
+            sender: Email sender
+            content: Full email content
+            summary: Generated summary of the content
+            received_date: When the email was received; naive datetimes are taken as UTC
+            category: Email category (defaults to SAVE_AND_SUMMARIZE)
+
+        Returns:
+            UUID of the created record
+
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        async with self.get_session() as session:
+            result = await session.execute(_INSERT_SAVED_EMAIL, {
+                'email_id': email_id,
+                'subject': subject,
+                'sender': sender,
+                'content': content,
+                'summary': summary,
+                'received_date': _ensure_aware(received_date),
+                'category': category
+            })
+            return result.scalar_one()
+
+    async def archive_saved_emails_bulk(self, records: List[Dict[str, Any]]) -> List[UUID]:
+        """Archive many saved emails with asyncpg's binary COPY
+
+        Args:
+            records: Dicts with the same keys as archive_saved_email's arguments
+
+        Returns:
+            UUIDs of the created records, in the same order as records
+
+        Raises:
+            SQLAlchemyError: If there's a database error
+            asyncpg.PostgresError: If the data can't be copied, e.g. a duplicate email_id
+        """
+        if not records:
+            return []
+
+        record_ids = [uuid4() for _ in records]
+        rows = [
+            (
+                record_id,
+                record['email_id'],
+                record['subject'],
+                record['sender'],
+                record['content'],
+                record['summary'],
+                _ensure_aware(record['received_date']),
+                record.get('category', EmailCategory.SAVE_AND_SUMMARIZE).code
+            )
+            for record_id, record in zip(record_ids, records)
+        ]
+
+        async with self.get_session() as session:
+            # Runs on the session's connection, inside its transaction
+            connection = await session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                'saved_emails',
+                records=rows,
+                columns=('id', 'email_id', 'subject', 'sender', 'content', 'summary', 'received_date', 'category'),
+                schema_name=self.schema
+            )
+        return record_ids
+
+    async def add_processing_history_bulk(self, records: List[Dict[str, Any]]) -> int:
+        """Insert many processing history records in a single transaction
+
+        Args:
+            records: Dicts with the same keys as DatabaseManager.add_processing_history's arguments
+
+        Returns:
+            Number of records inserted
+
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not records:
+            return 0
+
+        async with self.get_session() as session:
+            await session.execute(insert(ProcessingHistory), records)
+        return len(records)
+
+    async def get_saved_email(self, email_id: str) -> Optional[SavedEmail]:
+        """Retrieve saved email by email ID"""
+        async with self.get_session() as session:
+            result = await session.execute(_SAVED_EMAIL_BY_EMAIL_ID, {'email_id': email_id})
+            return result.scalars().first()
+
+    async def get_deleted_email(self, email_id: str) -> Optional[DeletedEmail]:
+        """Retrieve deleted email metadata by email ID"""
+        async with self.get_session() as session:
+            result = await session.execute(_DELETED_EMAIL_BY_EMAIL_ID, {'email_id': email_id})
+            return result.scalars().first()
+
+    async def get_processing_history(self, email_id: str) -> List[ProcessingHistory]:
+        """Get processing history for an email, ordered by processing date"""
+        async with self.get_session() as session:
+            result = await session.execute(_HISTORY_BY_EMAIL_ID, {'email_id': email_id})
+            return result.scalars().all()
+
+    async def get_cached_analysis(self, key: str, max_age: timedelta) -> Optional[AnalysisCacheEntry]:
+        """Retrieve a cached analysis that is newer than max_age"""
+        async with self.get_session() as session:
+            result = await session.execute(_FRESH_CACHED_ANALYSIS, {
+                'key': key,
+                'min_created_at': datetime.now(timezone.utc) - max_age
+            })
+            return result.scalars().first()
+
+    async def store_cached_analysis(self, key: str, category: EmailCategory, confidence: float,
+                                    reasoning: Optional[str] = None, summary: Optional[str] = None) -> None:
+        """Insert or refresh a cached analysis"""
+        values = dict(
+            key=key,
+            category=category,
+            confidence=confidence,
+            reasoning=reasoning,
+            summary=summary,
+            created_at=datetime.now(timezone.utc)
+        )
+        stmt = pg_insert(AnalysisCacheEntry).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AnalysisCacheEntry.key],
+            set_={name: stmt.excluded[name] for name in values if name != 'key'}
+        )
+        async with self.get_session() as session:
+            await session.execute(stmt)
@@ -1,19 +1,146 @@
+import functools
+import io
+import threading
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from uuid import UUID, uuid4
 
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy import String, any_, bindparam, create_engine, event, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import raiseload, sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..config import config
 from ..logger import get_logger
-from .models import Base, DeletedEmail, SavedEmail, ProcessingHistory, EmailCategory
+from .models import Base, DeletedEmail, SavedEmail, ProcessingHistory, EmailCategory, AnalysisCacheEntry
 
 logger = get_logger(__name__)
 
+# Engines (and their connection pools) are shared by every DatabaseManager
+# that connects to the same database and schema
+_engines: Dict[Tuple[str, str], Engine] = {}
+_engines_lock = threading.Lock()
+
+# Hot lookups are built once with bound parameters so every call hits
+# SQLAlchemy's compiled statement cache with the same statement. Getters return
+# detached objects, so any relationship added later must be loaded eagerly;
+# raiseload makes a forgotten one fail loudly instead of issuing a query per row.
+_SAVED_EMAIL_BY_EMAIL_ID = select(SavedEmail)\
+    .where(SavedEmail.email_id == bindparam('email_id'))\
+    .options(raiseload('*'))
+_DELETED_EMAIL_BY_EMAIL_ID = select(DeletedEmail)\
+    .where(DeletedEmail.email_id == bindparam('email_id'))\
+    .options(raiseload('*'))
+_HISTORY_BY_EMAIL_ID = select(ProcessingHistory)\
+    .where(ProcessingHistory.email_id == bindparam('email_id'))\
+    .order_by(ProcessingHistory.processing_date)\
+    .options(raiseload('*'))
+# Batch lookups; the expanding parameter renders one IN list per call
+_SAVED_EMAILS_BY_EMAIL_IDS = select(SavedEmail)\
+    .where(SavedEmail.email_id.in_(bindparam('email_ids', expanding=True)))\
+    .options(raiseload('*'))
+_HISTORY_BY_EMAIL_IDS = select(ProcessingHistory)\
+    .where(ProcessingHistory.email_id.in_(bindparam('email_ids', expanding=True)))\
+    .order_by(ProcessingHistory.email_id, ProcessingHistory.processing_date)\
+    .options(raiseload('*'))
+# Ids are generated by the database and returned by the insert
+_INSERT_DELETED_EMAIL = insert(DeletedEmail.__table__).returning(DeletedEmail.__table__.c.id)
+_INSERT_SAVED_EMAIL = insert(SavedEmail.__table__).returning(SavedEmail.__table__.c.id)
+_INSERT_HISTORY = insert(ProcessingHistory).returning(ProcessingHistory)
+_FRESH_CACHED_ANALYSIS = select(AnalysisCacheEntry)\
+    .where(AnalysisCacheEntry.key == bindparam('key'))\
+    .where(AnalysisCacheEntry.created_at > bindparam('min_created_at'))
+# Keys are bound as one array, so batches of any size share a statement
+_FRESH_CACHED_ANALYSES = select(AnalysisCacheEntry)\
+    .where(AnalysisCacheEntry.key == any_(bindparam('keys', type_=ARRAY(String))))\
+    .where(AnalysisCacheEntry.created_at > bindparam('min_created_at'))
+_UPSERT_CACHED_ANALYSIS = pg_insert(AnalysisCacheEntry)
+_UPSERT_CACHED_ANALYSIS = _UPSERT_CACHED_ANALYSIS.on_conflict_do_update(
+    index_elements=[AnalysisCacheEntry.key],
+    set_={
+        name: _UPSERT_CACHED_ANALYSIS.excluded[name]
+        for name in ('category', 'confidence', 'reasoning', 'summary', 'created_at')
+    }
+)
+
+INIT_SCRIPT_PATH = Path(__file__).parent.parent.parent / 'scripts' / 'db-init.sql'
+
+# Tables created by the initialization script
+_SCHEMA_TABLES = frozenset({'processing_history', 'saved_emails', 'deleted_emails', 'analysis_cache'})
+# Tables the manager cannot run without; the analysis cache is best effort
+_REQUIRED_TABLES = frozenset({'processing_history', 'saved_emails', 'deleted_emails'})
+
+def _ensure_aware(value: datetime) -> datetime:
+    """Return a timezone-aware datetime, treating naive values as UTC."""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+# Characters with special meaning in COPY's text format
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+def _copy_value(value: Any) -> str:
+    """Format a value as a field of COPY's text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+def _search_path_setter(schema: str):
+    """Build a connect listener that sets the search path once per physical connection."""
+    def set_search_path(dbapi_connection, connection_record):
+        # Autocommit so the SET isn't rolled back with the first transaction.
+        # Include public for the pgcrypto functions.
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"SET SESSION search_path TO {schema}, public")
+        finally:
+            cursor.close()
+            dbapi_connection.autocommit = autocommit
+    return set_search_path
+
+@functools.lru_cache(maxsize=1)
+def _load_init_sql() -> str:
+    """Read the initialization script once per process."""
+    with open(INIT_SCRIPT_PATH, 'rb', buffering=1 << 20) as f:
+        return f.read().decode('utf-8')
+
+def _get_engine(connection_string: str, schema: str) -> Engine:
+    """Return the pooled engine for a connection string and schema, creating it on first use."""
+    with _engines_lock:
+        engine = _engines.get((connection_string, schema))
+        if engine is None:
+            connect_args = {}
+            if config.db.statement_timeout:
+                # Sent as a startup parameter; PgBouncer needs it in ignore_startup_parameters
+                connect_args['options'] = f"-c statement_timeout={config.db.statement_timeout}"
+            engine = create_engine(
+                connection_string,
+                pool_size=config.db.pool_size,
+                max_overflow=config.db.max_overflow,
+                pool_timeout=config.db.pool_timeout,
+                pool_pre_ping=True,
+                pool_recycle=config.db.pool_recycle,
+                # Reuse the most recently returned connection so bursts stay on warm
+                # connections and idle ones can be closed by the server or PgBouncer
+                pool_use_lifo=True,
+                # INSERTs are already batched into multi-row VALUES; also page
+                # executemany UPDATEs and DELETEs through psycopg2's execute_batch
+                executemany_mode='values_plus_batch',
+                executemany_batch_page_size=500,
+                insertmanyvalues_page_size=1000,
+                # Room for every compiled statement variant, so none are compiled twice
+                query_cache_size=1200,
+                connect_args=connect_args
+            )
+            event.listen(engine, 'connect', _search_path_setter(schema), insert=True)
+            _engines[(connection_string, schema)] = engine
+        return engine
+
 class DatabaseManager:
     def __init__(self, schema: str = 'public', database_name: Optional[str] = None):
         """Initialize database connection and session factory
@@ -22,26 +149,36 @@ class DatabaseManager:
             schema: Database schema to use (defaults to 'public')
             database_name: Optional database name to override config
         """
-        db_name = database_name or config.db.name
-        connection_string = f"postgresql://{config.db.user}:{config.db.password}@{config.db.host}:{config.db.port}/{db_name}"
-        self.engine = create_engine(connection_string)
-        self.SessionLocal = sessionmaker(bind=self.engine)
+        if database_name:
+            connection_string = config.db.connection_string_for(database_name)
+        else:
+            connection_string = config.db.connection_string
+        self.engine = _get_engine(connection_string, schema)
+        # Loaded objects keep their attributes after the session commits and closes,
+        # so getters can return them detached without re-selecting or expunging.
+        # Writes are explicit INSERT statements, so there is nothing to autoflush.
+        self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False, autoflush=False)
         self.schema = schema
 
         # Set the schema for SQLAlchemy models
         Base.metadata.schema = schema
 
-    def create_tables(self) -> None:
-        """Create database tables if they don't exist"""
+    def create_tables(self, force: bool = False) -> None:
+        """Create database tables if they don't exist
+
+        Args:
+            force: Run the initialization script even if the tables already exist.
+                The script drops and recreates every table, so existing data is lost.
+        """
         try:
-            # Read and execute initialization script
-            script_path = Path(__file__).parent.parent.parent / 'scripts' / 'db-init.sql'
-            with open(script_path, 'r') as f:
-                sql_script = f.read()
-            
-            with self.engine.connect() as conn:
-                conn.execute(text(sql_script))
-                conn.commit()
+            if not force and self._tables_exist(_SCHEMA_TABLES):
+                logger.info("Database tables already exist, skipping initialization")
+                return
+
+            sql_script = _load_init_sql()
+            with self.engine.begin() as conn:
+                # Without parameters psycopg2 leaves the script's % format() placeholders alone
+                conn.execution_options(no_parameters=True).exec_driver_sql(sql_script)
             
             logger.info("Database tables created successfully")
         except SQLAlchemyError as e:
@@ -51,13 +188,29 @@ class DatabaseManager:
             logger.error(f"Could not find initialization script: {e}")
             raise
 
+    def ensure_history_partitions(self, months_ahead: int = 3) -> None:
+        """Create the monthly processing history partitions that will be needed soon
+        
+        Rows outside the existing partitions go to the default partition, so this
+        only needs to run regularly, e.g. once per run, not before every insert.
+        
+        Args:
+            months_ahead: Number of months after the current one to create
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        with self.get_session() as session:
+            session.execute(
+                text("SELECT ensure_processing_history_partitions(:months_ahead)"),
+                {'months_ahead': months_ahead}
+            )
+
     @contextmanager
     def get_session(self) -> Session:
         """Get a database session with automatic cleanup"""
         session = self.SessionLocal()
         try:
-            # Set the search path to include both schema and public (for uuid-ossp)
-            session.execute(text(f"SET search_path TO {self.schema}, public"))
             yield session
             session.commit()
         except Exception as e:
@@ -81,19 +234,41 @@ class DatabaseManager:
         Raises:
             SQLAlchemyError: If there's a database error
         """
-        record_id = uuid4()
-        deleted_email = DeletedEmail(
-            id=record_id,
-            email_id=email_id,
-            subject=subject,
-            sender=sender,
-            content=content
-        )
+        with self.get_session() as session:
+            # Plain Core insert; nothing needs the ORM object, so skip the unit of work
+            return session.execute(_INSERT_DELETED_EMAIL, {
+                'email_id': email_id,
+                'subject': subject,
+                'sender': sender,
+                'content': content
+            }).scalar_one()
+
+    def store_deleted_emails_bulk(self, records: List[Dict[str, Any]]) -> List[UUID]:
+        """Store metadata for many deleted emails with a single COPY
+        
+        Args:
+            records: Dicts with the same keys as store_deleted_email's arguments
+                (email_id, subject, sender and optionally content)
+            
+        Returns:
+            UUIDs of the created records, in the same order as records
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+            psycopg2.Error: If the data can't be copied, e.g. a duplicate email_id
+        """
+        if not records:
+            return []
+        
+        record_ids = [uuid4() for _ in records]
+        rows = [
+            (record_id, record['email_id'], record['subject'], record['sender'], record.get('content'))
+            for record_id, record in zip(record_ids, records)
+        ]
         
         with self.get_session() as session:
-            session.add(deleted_email)
-            session.flush()  # Ensure the record is created and id is available
-            return record_id
+            self._copy_rows(session, 'deleted_emails', ('id', 'email_id', 'subject', 'sender', 'content'), rows)
+        return record_ids
 
     def archive_saved_email(self, email_id: str, subject: str, sender: str, 
                            content: str, summary: str, received_date: datetime,
@@ -106,7 +281,7 @@ class DatabaseManager:
             sender: Email sender
             content: Full email content
             summary: Generated summary of the content
-            received_date: When the email was received (should be timezone-aware)
+            received_date: When the email was received; naive datetimes are taken as UTC
             category: Email category (defaults to SAVE_AND_SUMMARIZE)
             
         Returns:
@@ -114,27 +289,77 @@ class DatabaseManager:
             
         Raises:
             SQLAlchemyError: If there's a database error
-            ValueError: If received_date is not timezone-aware
         """
-        if received_date.tzinfo is None:
-            raise ValueError("received_date must be timezone-aware")
+        with self.get_session() as session:
+            # Plain Core insert; nothing needs the ORM object, so skip the unit of work
+            return session.execute(_INSERT_SAVED_EMAIL, {
+                'email_id': email_id,
+                'subject': subject,
+                'sender': sender,
+                'content': content,
+                'summary': summary,
+                'received_date': _ensure_aware(received_date),
+                'category': category
+            }).scalar_one()
+
+    def archive_saved_emails_bulk(self, records: List[Dict[str, Any]]) -> List[UUID]:
+        """Archive many saved emails with a single COPY
+        
+        Args:
+            records: Dicts with the same keys as archive_saved_email's arguments
+                (email_id, subject, sender, content, summary, received_date and
+                optionally category)
             
-        record_id = uuid4()
-        saved_email = SavedEmail(
-            id=record_id,
-            email_id=email_id,
-            subject=subject,
-            sender=sender,
-            content=content,
-            summary=summary,
-            received_date=received_date,
-            category=category
-        )
+        Returns:
+            UUIDs of the created records, in the same order as records
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+            psycopg2.Error: If the data can't be copied, e.g. a duplicate email_id
+        """
+        if not records:
+            return []
+        
+        record_ids = [uuid4() for _ in records]
+        rows = [
+            (
+                record_id,
+                record['email_id'],
+                record['subject'],
+                record['sender'],
+                record['content'],
+                record['summary'],
+                _ensure_aware(record['received_date']),
+                record.get('category', EmailCategory.SAVE_AND_SUMMARIZE).code
+            )
+            for record_id, record in zip(record_ids, records)
+        ]
         
         with self.get_session() as session:
-            session.add(saved_email)
-            session.flush()  # Ensure the record is created and id is available
-            return record_id
+            self._copy_rows(
+                session,
+                'saved_emails',
+                ('id', 'email_id', 'subject', 'sender', 'content', 'summary', 'received_date', 'category'),
+                rows
+            )
+        return record_ids
+
+    def _copy_rows(self, session: Session, table: str, columns: tuple, rows: List[tuple]) -> None:
+        """Stream rows into a table with COPY FROM STDIN within the session's transaction."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(_copy_value(value) for value in row))
+            buffer.write('\n')
+        buffer.seek(0)
+        
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.schema}.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)",
+                buffer
+            )
+        finally:
+            cursor.close()
 
     def add_processing_history(
         self, 
@@ -148,7 +373,7 @@ class DatabaseManager:
         reasoning: Optional[str] = None
     ) -> ProcessingHistory:
         """Add a record to processing history."""
-        history = ProcessingHistory(
+        values = dict(
             email_id=email_id,
             action=action,
             category=category,
@@ -158,15 +383,53 @@ class DatabaseManager:
             reasoning=reasoning
         )
         
+        # INSERT ... RETURNING builds the record from the inserted row without
+        # going through the unit of work; it still runs in the caller's transaction
         if session is None:
             with self.get_session() as session:
-                session.add(history)
-                session.commit()
-                return session.query(ProcessingHistory).filter_by(id=history.id).first()
-        else:
-            session.add(history)
-            session.flush()  # Flush to get the ID but don't commit yet
-            return history
+                return session.scalars(_INSERT_HISTORY, [values]).one()
+        return session.scalars(_INSERT_HISTORY, [values]).one()
+
+    def add_processing_history_bulk(self, records: List[Dict[str, Any]]) -> int:
+        """Insert many processing history records in a single transaction
+        
+        Args:
+            records: Dicts with the same keys as add_processing_history's arguments
+                (email_id, action, category, confidence, success and optionally
+                error_message and reasoning)
+            
+        Returns:
+            Number of records inserted
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not records:
+            return 0
+        
+        with self.get_session() as session:
+            # A list of parameter sets is sent as a single executemany
+            session.execute(insert(ProcessingHistory), records)
+        return len(records)
+
+    def bulk_seed(self, deleted: Optional[List[Dict[str, Any]]] = None,
+                  saved: Optional[List[Dict[str, Any]]] = None,
+                  history: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Insert rows into several tables in one transaction. Use for seeding test data.
+        
+        Args:
+            deleted: Column values for deleted_emails rows
+            saved: Column values for saved_emails rows
+            history: Column values for processing_history rows
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        with self.get_session() as session:
+            for model, rows in ((DeletedEmail, deleted), (SavedEmail, saved), (ProcessingHistory, history)):
+                if rows:
+                    # One executemany per table, committed together
+                    session.execute(insert(model), rows)
 
     def get_saved_email(self, email_id: str) -> Optional[SavedEmail]:
         """Retrieve saved email by email ID
@@ -181,28 +444,40 @@ class DatabaseManager:
             SQLAlchemyError: If there's a database error
         """
         with self.get_session() as session:
-            # Query for the content and ensure we get a fresh instance
-            result = session.query(SavedEmail)\
-                .filter(SavedEmail.email_id == email_id)\
-                .first()
+            result = session.execute(_SAVED_EMAIL_BY_EMAIL_ID, {'email_id': email_id}).scalars().first()
+            return result
+
+    def list_saved_emails(
+        self, limit: int = 100, before: Optional[Tuple[datetime, UUID]] = None
+    ) -> Tuple[List[SavedEmail], Optional[Tuple[datetime, UUID]]]:
+        """List saved emails, newest first, one page at a time
+        
+        Pages are selected with a keyset on (received_date, id) rather than an
+        OFFSET, so fetching a later page costs the same as fetching the first.
+        
+        Args:
+            limit: Maximum number of emails to return
+            before: Cursor returned with the previous page, or None for the first page
             
-            if result is None:
-                return None
+        Returns:
+            Tuple of the saved emails and the cursor for the next page, which is
+            None when there are no more emails
             
-            # Create a detached copy with all attributes loaded
-            session.refresh(result)
-            saved_email = SavedEmail(
-                id=result.id,
-                email_id=result.email_id,
-                subject=result.subject,
-                sender=result.sender,
-                content=result.content,
-                summary=result.summary,
-                received_date=result.received_date,
-                category=result.category,
-                archived_date=result.archived_date
-            )
-            return saved_email
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        stmt = select(SavedEmail)\
+            .order_by(SavedEmail.received_date.desc(), SavedEmail.id.desc())\
+            .limit(limit)\
+            .options(raiseload('*'))
+        if before is not None:
+            stmt = stmt.where(tuple_(SavedEmail.received_date, SavedEmail.id) < tuple_(*before))
+        
+        with self.get_session() as session:
+            emails = session.execute(stmt).scalars().all()
+        
+        next_cursor = (emails[-1].received_date, emails[-1].id) if len(emails) == limit else None
+        return emails, next_cursor
 
     def get_deleted_email(self, email_id: str) -> Optional[DeletedEmail]:
         """Retrieve deleted email metadata by email ID
@@ -217,16 +492,7 @@ class DatabaseManager:
             SQLAlchemyError: If there's a database error
         """
         with self.get_session() as session:
-            # Query for the email and ensure we get a fresh instance
-            result = session.query(DeletedEmail)\
-                .filter(DeletedEmail.email_id == email_id)\
-                .first()
-            
-            if result is None:
-                return None
-            
-            # Detach the instance from the session but ensure all attributes are loaded
-            session.refresh(result)
+            result = session.execute(_DELETED_EMAIL_BY_EMAIL_ID, {'email_id': email_id}).scalars().first()
             return result
 
     def get_processing_history(self, email_id: str) -> List[ProcessingHistory]:
@@ -243,18 +509,136 @@ class DatabaseManager:
         """
         with self.get_session() as session:
             # Query for all history records for this email
-            history = session.query(ProcessingHistory)\
-                .filter(ProcessingHistory.email_id == email_id)\
-                .order_by(ProcessingHistory.processing_date)\
-                .all()
+            history = session.execute(_HISTORY_BY_EMAIL_ID, {'email_id': email_id}).scalars().all()
+            return history
+
+    def get_saved_emails_many(self, email_ids: List[str]) -> Dict[str, SavedEmail]:
+        """Retrieve saved emails for several email IDs in one query
+        
+        Args:
+            email_ids: Unique identifiers of the emails
             
-            # Ensure all attributes are loaded before detaching
-            for record in history:
-                session.refresh(record)
-                # Expunge the record so it's fully detached with loaded attributes
-                session.expunge(record)
+        Returns:
+            Dict of SavedEmail keyed by email ID; emails that aren't saved are omitted
             
-            return history
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not email_ids:
+            return {}
+        
+        with self.get_session() as session:
+            emails = session.execute(_SAVED_EMAILS_BY_EMAIL_IDS, {'email_ids': list(email_ids)}).scalars()
+            return {email.email_id: email for email in emails}
+
+    def get_processing_history_many(self, email_ids: List[str]) -> Dict[str, List[ProcessingHistory]]:
+        """Get processing history for several emails in one query
+        
+        Args:
+            email_ids: Unique identifiers of the emails
+            
+        Returns:
+            Dict keyed by email ID of ProcessingHistory records ordered by processing
+            date; emails without history are omitted
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not email_ids:
+            return {}
+        
+        history: Dict[str, List[ProcessingHistory]] = {}
+        with self.get_session() as session:
+            records = session.execute(_HISTORY_BY_EMAIL_IDS, {'email_ids': list(email_ids)}).scalars()
+            for record in records:
+                history.setdefault(record.email_id, []).append(record)
+        return history
+
+    def get_cached_analysis(self, key: str, max_age: timedelta) -> Optional[AnalysisCacheEntry]:
+        """Retrieve a cached analysis that is newer than max_age
+        
+        Args:
+            key: Cache key of the email
+            max_age: Entries older than this are ignored
+            
+        Returns:
+            AnalysisCacheEntry if found and fresh, None otherwise
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        with self.get_session() as session:
+            result = session.execute(_FRESH_CACHED_ANALYSIS, {
+                'key': key,
+                'min_created_at': datetime.now(timezone.utc) - max_age
+            }).scalars().first()
+            return result
+
+    def store_cached_analysis(self, key: str, category: EmailCategory, confidence: float,
+                              reasoning: Optional[str] = None, summary: Optional[str] = None) -> None:
+        """Insert or refresh a cached analysis
+        
+        Args:
+            key: Cache key of the email
+            category: Analyzed category
+            confidence: Analysis confidence
+            reasoning: Analysis reasoning
+            summary: Summary, for emails that are saved
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        self.store_cached_analyses([dict(
+            key=key,
+            category=category,
+            confidence=confidence,
+            reasoning=reasoning,
+            summary=summary
+        )])
+
+    def get_cached_analyses(self, keys: List[str], max_age: timedelta) -> Dict[str, AnalysisCacheEntry]:
+        """Retrieve the cached analyses newer than max_age for several keys in one query
+        
+        Args:
+            keys: Cache keys of the emails
+            max_age: Entries older than this are ignored
+            
+        Returns:
+            Dict of AnalysisCacheEntry keyed by cache key; missing or stale keys are omitted
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not keys:
+            return {}
+        
+        with self.get_session() as session:
+            entries = session.execute(_FRESH_CACHED_ANALYSES, {
+                'keys': list(keys),
+                'min_created_at': datetime.now(timezone.utc) - max_age
+            }).scalars()
+            return {entry.key: entry for entry in entries}
+
+    def store_cached_analyses(self, records: List[Dict[str, Any]]) -> None:
+        """Insert or refresh several cached analyses in one statement
+        
+        Args:
+            records: Dicts with the same keys as store_cached_analysis's arguments
+            
+        Raises:
+            SQLAlchemyError: If there's a database error
+        """
+        if not records:
+            return
+        
+        # A statement can't update the same row twice, so the last record per key wins
+        created_at = datetime.now(timezone.utc)
+        rows = {
+            record['key']: {'reasoning': None, 'summary': None, **record, 'created_at': created_at}
+            for record in records
+        }
+        with self.get_session() as session:
+            session.execute(_UPSERT_CACHED_ANALYSIS, list(rows.values()))
 
     def check_tables_exist(self) -> bool:
         """Check if all required database tables exist.
@@ -262,35 +646,36 @@ class DatabaseManager:
         Returns:
             bool: True if all tables exist, False otherwise
         """
-        required_tables = {'processing_history', 'saved_emails', 'deleted_emails'}
         try:
-            with self.engine.connect() as conn:
-                # Get list of existing tables
-                result = conn.execute(text("""
-                    SELECT tablename 
-                    FROM pg_catalog.pg_tables 
-                    WHERE schemaname = :schema
-                """), {'schema': self.schema})
-                existing_tables = {row[0] for row in result}
-                
-                # Check if all required tables exist
-                return required_tables.issubset(existing_tables)
+            return self._tables_exist(_REQUIRED_TABLES)
         except SQLAlchemyError as e:
             logger.error(f"Error checking tables: {e}")
             return False
 
+    def _tables_exist(self, tables: frozenset) -> bool:
+        """Check whether all of the given tables exist in the schema."""
+        # One to_regclass lookup per table, so the result is a single row no
+        # matter how many other tables the schema has
+        names = sorted(tables)
+        checks = ', '.join(f"to_regclass(:t{index}) IS NOT NULL" for index in range(len(names)))
+        params = {f"t{index}": f"{self.schema}.{name}" for index, name in enumerate(names)}
+        with self.engine.connect() as conn:
+            row = conn.execute(text(f"SELECT {checks}"), params).one()
+            return all(row)
+
     def clear_tables(self) -> None:
         """Clear all tables in the database. Use only for testing.
         
-        This method truncates all tables in the current schema while maintaining
-        the table structure. It should only be used for testing purposes.
+        This method deletes every row from all tables in the current schema while
+        maintaining the table structure. It should only be used for testing purposes.
         
         Raises:
             SQLAlchemyError: If there's a database error
         """
+        # The test tables hold a handful of rows, where DELETE beats TRUNCATE's
+        # fixed catalog and lock work. DELETE also only takes a ROW EXCLUSIVE lock,
+        # so it doesn't block other sessions. There are no foreign keys to follow.
+        statements = '; '.join(f"DELETE FROM {self.schema}.{table}" for table in sorted(_SCHEMA_TABLES))
         with self.get_session() as session:
-            # Clear all tables in a specific order to handle foreign keys
-            session.execute(text(f"TRUNCATE TABLE {self.schema}.processing_history CASCADE"))
-            session.execute(text(f"TRUNCATE TABLE {self.schema}.saved_emails CASCADE"))
-            session.execute(text(f"TRUNCATE TABLE {self.schema}.deleted_emails CASCADE"))
-            session.commit()
+            # Sent as one round trip; get_session commits
+            session.execute(text(statements))
@@ -1,16 +1,16 @@
-import uuid
 from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import Column, String, Text, DateTime, Boolean, Enum as SQLAlchemyEnum, ForeignKey, Float
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Float, Index, SmallInteger, text
+from sqlalchemy.types import TypeDecorator
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
 class EmailCategory(str, Enum):
-    """Email categories enum matching the database enum"""
+    """Email categories enum, stored in the database as a small integer code"""
     SAVE_AND_SUMMARIZE = 'SAVE_AND_SUMMARIZE'
     NON_ESSENTIAL = 'NON_ESSENTIAL'
     IMPORTANT = 'IMPORTANT'
@@ -19,17 +19,53 @@ class EmailCategory(str, Enum):
         """Return the value when converting to string."""
         return self.value
 
+    @property
+    def code(self) -> int:
+        """Return the code stored in the database."""
+        return _CATEGORY_CODES[self]
+
+# Codes are persisted; never renumber existing categories, only append new ones
+_CATEGORY_CODES = {
+    EmailCategory.SAVE_AND_SUMMARIZE: 1,
+    EmailCategory.NON_ESSENTIAL: 2,
+    EmailCategory.IMPORTANT: 3,
+}
+_CATEGORIES_BY_CODE = {code: category for category, code in _CATEGORY_CODES.items()}
+
+class CategoryCode(TypeDecorator):
+    """Stores an EmailCategory as a SMALLINT code.
+
+    Half the width of a PostgreSQL enum, and new categories need no ALTER TYPE.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return EmailCategory(value).code
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _CATEGORIES_BY_CODE[value]
+
 class DeletedEmail(Base):
     """Model for storing metadata of deleted emails"""
     __tablename__ = 'deleted_emails'
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     email_id = Column(String(255), unique=True, nullable=False)
     subject = Column(Text, nullable=False)
     sender = Column(String(255), nullable=False)
     content = Column(Text)  # Optional, for potential recovery
     deletion_date = Column(DateTime(timezone=True), default=datetime.utcnow)
 
+    # Index names match scripts/db-init.sql
+    __table_args__ = (
+        Index('idx_deleted_emails_deletion_date', 'deletion_date'),
+    )
+
     def __repr__(self):
         return f"<DeletedEmail(email_id='{self.email_id}', subject='{self.subject}')>"
 
@@ -37,16 +73,21 @@ class SavedEmail(Base):
     """Model for archiving emails that should be saved and summarized based on user preferences"""
     __tablename__ = 'saved_emails'
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     email_id = Column(String(255), unique=True, nullable=False)
     subject = Column(Text, nullable=False)
     sender = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(Text, nullable=False)
     received_date = Column(DateTime(timezone=True), nullable=False)
-    category = Column(SQLAlchemyEnum(EmailCategory), nullable=False)
+    category = Column(CategoryCode, nullable=False)
     archived_date = Column(DateTime(timezone=True), default=datetime.utcnow)
 
+    __table_args__ = (
+        Index('idx_saved_emails_category', 'category'),
+        Index('idx_saved_emails_received_date', 'received_date'),
+    )
+
     def __repr__(self):
         return f"<SavedEmail(email_id='{self.email_id}', subject='{self.subject}')>"
 
@@ -54,15 +95,39 @@ class ProcessingHistory(Base):
     """Model for tracking email processing history"""
     __tablename__ = 'processing_history'
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     email_id = Column(String(255), nullable=False)
     processing_date = Column(DateTime(timezone=True), default=datetime.utcnow)
     action = Column(String(50), nullable=False)  # 'deleted', 'archived', 'marked_read'
-    category = Column(SQLAlchemyEnum(EmailCategory), nullable=False)
+    category = Column(CategoryCode, nullable=False)
     confidence = Column(Float, nullable=False, default=0.0)
     success = Column(Boolean, nullable=False)
     error_message = Column(Text)
     reasoning = Column(Text)
 
+    __table_args__ = (
+        # Serves lookups by email_id with the history already in date order
+        Index('idx_processing_history_email_id_date', 'email_id', 'processing_date'),
+        Index('idx_processing_history_date', 'processing_date'),
+    )
+
     def __repr__(self):
         return f"<ProcessingHistory(email_id='{self.email_id}', action='{self.action}', confidence={self.confidence}, success={self.success})>"
+
+class AnalysisCacheEntry(Base):
+    """Model for persisting Claude analysis results of previously seen emails"""
+    __tablename__ = 'analysis_cache'
+
+    key = Column(String(32), primary_key=True)  # blake2b hex digest of model and email
+    category = Column(CategoryCode, nullable=False)
+    confidence = Column(Float, nullable=False)
+    reasoning = Column(Text)
+    summary = Column(Text)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_analysis_cache_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<AnalysisCacheEntry(key='{self.key}', category='{self.category}')>"
@@ -1,25 +1,55 @@
 """
 Gmail authentication module for handling OAuth2 flow.
 """
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows; token refreshes are not locked there
+    fcntl = None
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import orjson
+from googleapiclient.discovery import Resource, build
+from googleapiclient.model import JsonModel
 
 from ..config import config
 from ..logger import get_logger
 
 logger = get_logger(__name__)
 
+# Built services and the credentials they were built with, keyed by token file
+# and scopes, shared by every authenticator in the process so the discovery
+# document is only parsed once
+_services: Dict[Tuple[str, Tuple[str, ...]], Tuple[Resource, Credentials]] = {}
+_services_lock = threading.Lock()
+
+class OrjsonModel(JsonModel):
+    """JsonModel that parses responses with orjson, which is several times faster
+    than json on large message payloads."""
+
+    def deserialize(self, content):
+        body = orjson.loads(content)
+        if self._data_wrapper and 'data' in body:
+            body = body['data']
+        return body
+
+# Refresh access tokens this long before they expire
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
 class GmailAuthenticator:
     """Handles Gmail API authentication using OAuth2."""
     
     def __init__(self):
         """Initialize the Gmail authenticator with configuration."""
-        print("Initializing Gmail Authenticator...")
+        logger.debug("Initializing Gmail Authenticator")
         self.credentials_file = Path(config.gmail.credentials_file)
         # Default token file location if not specified
         token_file = config.gmail.token_file or 'token.json'
@@ -33,14 +63,53 @@ class GmailAuthenticator:
         Returns:
             googleapiclient.discovery.Resource: Authenticated Gmail service
         """
-        creds = self._get_credentials()
-        print("Creating Gmail service with authenticated credentials...")
-        return build('gmail', 'v1', credentials=creds)
+        return self._get_service_and_credentials()[0]
+    
+    def get_credentials(self) -> Credentials:
+        """
+        Return the credentials the Gmail service was built with.
+        
+        Returns:
+            Credentials shared with the service, so refreshing one refreshes both
+        """
+        return self._get_service_and_credentials()[1]
+    
+    def _get_service_and_credentials(self) -> Tuple[Resource, Credentials]:
+        key = (str(self.token_file.resolve()), tuple(self.scopes))
+        with _services_lock:
+            cached = _services.get(key)
+            if cached is None:
+                creds = self._get_credentials()
+                logger.debug("Creating Gmail service with authenticated credentials")
+                # Use the discovery document bundled with the client library
+                # instead of fetching it over HTTPS
+                service = build('gmail', 'v1', credentials=creds, model=OrjsonModel(),
+                                static_discovery=True, cache_discovery=False)
+                cached = _services[key] = (service, creds)
+        return cached
     
     def _get_credentials(self) -> Credentials:
         """
         Get valid credentials, refreshing or running auth flow if necessary.
         """
+        with self._token_lock():
+            return self._load_or_refresh_credentials()
+    
+    @contextmanager
+    def _token_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the token file so concurrent processes don't race to refresh it."""
+        if fcntl is None:
+            yield
+            return
+        self.token_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.token_file.with_name(self.token_file.name + '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _load_or_refresh_credentials(self) -> Credentials:
         creds: Optional[Credentials] = None
         
         # Load existing token if it exists
@@ -49,18 +118,25 @@ class GmailAuthenticator:
                 creds = Credentials.from_authorized_user_file(
                     str(self.token_file), self.scopes
                 )
-                print("Loaded existing credentials from token file")
+                logger.debug("Loaded existing credentials from token file")
             except Exception as e:
                 logger.warning(f"Error loading credentials from token file: {e}")
                 creds = None
         
+        # Refresh tokens that are about to expire too, so the first API call
+        # doesn't have to fail with a 401 and refresh mid-request
+        expiring = (
+            creds is not None and creds.valid and creds.expiry is not None
+            and creds.expiry - datetime.utcnow() < TOKEN_REFRESH_MARGIN
+        )
+        
         # If no valid credentials available, let's get them
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                print("Refreshing expired credentials...")
+        if not creds or not creds.valid or expiring:
+            if creds and creds.refresh_token and (creds.expired or expiring):
+                logger.info("Refreshing expired credentials")
                 creds.refresh(Request())
             else:
-                print("Starting OAuth flow to get new credentials...")
+                logger.info("Starting OAuth flow to get new credentials")
                 flow = InstalledAppFlow.from_client_secrets_file(
                     str(self.credentials_file), self.scopes
                 )
@@ -68,27 +144,34 @@ class GmailAuthenticator:
             
             # Save the credentials for the next run
             try:
-                self.token_file.parent.mkdir(parents=True, exist_ok=True)
-                self.token_file.write_text(creds.to_json())
-                print(f"Saved credentials to {self.token_file}")
-            except Exception as e:
-                logger.error(f"Error saving credentials: {e}")
+                self._save_credentials(creds)
+            except Exception:
+                pass  # Already logged; the credentials are still usable for this run
         
         return creds
     
     def _save_credentials(self, creds: Credentials) -> None:
-        """Save credentials to token file."""
+        """
+        Save credentials to token file.
+        
+        The token is written to a temporary file that replaces the old one in a
+        single rename, so a crash mid-write can't leave a truncated token that
+        would force the interactive OAuth flow on the next run.
+        """
         token_dir = self.token_file.parent
         token_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.token_file.with_name(self.token_file.name + '.tmp')
         
         try:
-            with open(self.token_file, 'w') as token:
+            # Create the file with owner-only permissions before writing the token
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as token:
                 token.write(creds.to_json())
-            print(f"Saved credentials to {self.token_file}")
-            
-            # Secure the token file
-            self.token_file.chmod(0o600)
+                token.flush()
+                os.fsync(token.fileno())
+            os.replace(tmp_file, self.token_file)
+            logger.debug("Saved credentials to %s", self.token_file)
         except Exception as e:
             logger.error(f"Error saving token file: {e}")
-            print(f"Error saving token file: {e}")
-            raise
\ No newline at end of file
+            tmp_file.unlink(missing_ok=True)
+            raise
@@ -6,11 +6,18 @@ It coordinates between Gmail service, Claude AI analyzer, and database operation
 to process emails based on their content and importance.
 """
 
+import heapq
+import queue
+import threading
 import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from email_manager.analyzer import EmailAnalyzer
+from email_manager.analyzer import EmailAnalyzer, ClaudeAPIError, InsufficientCreditsError
+from email_manager.config import config
 from email_manager.database import DatabaseManager, EmailCategory
 from email_manager.gmail.service import GmailService
 from email_manager.logger import get_logger
@@ -18,6 +25,20 @@ from email_manager.models import EmailContent, EmailAnalysis
 
 logger = get_logger(__name__)
 
+# Processing history is flushed at least this often during large batches
+HISTORY_FLUSH_SIZE = 100
+
+# Batches fetched ahead of the one being processed by process_all_unread_emails
+PREFETCH_BATCHES = 2
+
+@dataclass
+class Retry:
+    """An email whose processing failed and is due for another attempt."""
+    email: EmailContent
+    attempt: int  # Attempts made so far
+    next_ts: float  # time.monotonic() at which the next attempt is due
+    analysis: Optional[EmailAnalysis] = None  # Reused so Claude isn't asked again
+
 class EmailProcessingError(Exception):
     """Custom exception for email processing errors.
     
@@ -51,6 +72,11 @@ class EmailManager:
         self.gmail = gmail_service
         self.analyzer = email_analyzer
         self.db = db_manager
+        self._pending_history: List[dict] = []
+        self._history_lock = threading.Lock()
+        # Gmail changes queued by the handlers and applied once per batch
+        self._pending_gmail_actions: Dict[str, List[str]] = defaultdict(list)
+        self._gmail_actions_lock = threading.Lock()
         
     def process_unread_emails(self, batch_size: int = 10, max_retries: int = 3) -> None:
         """Process a batch of unread emails.
@@ -67,72 +93,229 @@ class EmailManager:
         """
         try:
             emails = self.gmail.get_unread_emails(max_results=batch_size)
-            logger.info(f"Found {len(emails)} unread emails to process")
+            self._process_batch(emails, max_retries)
+        except Exception as e:
+            logger.error("Error processing batch of emails: %s", e)
+            raise EmailProcessingError(f"Batch processing failed: {str(e)}")
+        finally:
+            self._flush_history()
+
+    def process_all_unread_emails(self, batch_size: int = 10, max_retries: int = 3) -> int:
+        """Process every unread email, batch_size at a time.
+        
+        The next batch is fetched from Gmail on a background thread while the
+        current one is analyzed, so Gmail latency hides behind Claude's.
+        
+        Args:
+            batch_size: Number of emails to process in one batch
+            max_retries: Maximum number of retry attempts for failed operations
             
-            for email in emails:
-                self._process_single_email(email, max_retries)
-                
+        Returns:
+            Number of emails processed
+            
+        Raises:
+            EmailProcessingError: If fetching or processing a batch fails;
+                later batches are not processed
+        """
+        # Bounded so the prefetcher stays only a few batches ahead
+        batches: queue.Queue = queue.Queue(maxsize=PREFETCH_BATCHES)
+        stop = threading.Event()
+        
+        def prefetch() -> None:
+            try:
+                for emails in self.gmail.iter_unread_batches(batch_size):
+                    if not self._put_until_stopped(batches, emails, stop):
+                        return
+            except Exception as e:
+                self._put_until_stopped(batches, e, stop)
+                return
+            self._put_until_stopped(batches, None, stop)
+        
+        threading.Thread(target=prefetch, name="gmail-prefetch", daemon=True).start()
+        
+        processed = 0
+        try:
+            while True:
+                emails = batches.get()
+                if emails is None:
+                    return processed
+                if isinstance(emails, Exception):
+                    raise emails
+                self._process_batch(emails, max_retries)
+                processed += len(emails)
         except Exception as e:
-            logger.error(f"Error processing batch of emails: {e}")
+            logger.error("Error processing batch of emails: %s", e)
             raise EmailProcessingError(f"Batch processing failed: {str(e)}")
+        finally:
+            stop.set()
+            self._flush_history()
+
+    @staticmethod
+    def _put_until_stopped(batches: queue.Queue, item, stop: threading.Event) -> bool:
+        """Queue an item for the consumer, giving up if it has stopped consuming."""
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _process_batch(self, emails: List[EmailContent], max_retries: int) -> None:
+        """Analyze and handle a batch of emails, raising the first email's failure."""
+        logger.info("Found %d unread emails to process", len(emails))
+        
+        # Categorize the whole batch with one request; emails without a
+        # batched result are analyzed individually in _process_single_email
+        analyses = self.analyzer.analyze_emails(emails)
+        
+        # Emails are independent and mostly wait on Claude and Gmail, so
+        # they are processed concurrently up to the Claude request limit.
+        # Failed attempts come back as Retry items and are resubmitted once
+        # their backoff has elapsed, so no worker sleeps while waiting.
+        errors = {}
+        retries = []  # Heap of (next_ts, index in batch, Retry)
+        with ThreadPoolExecutor(max_workers=config.claude.max_concurrency) as executor:
+            pending = {
+                executor.submit(self._process_single_email, email, max_retries, analysis): index
+                for index, (email, analysis) in enumerate(zip(emails, analyses))
+            }
+            while pending or retries:
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    _, index, retry = heapq.heappop(retries)
+                    pending[executor.submit(self._process_single_email, retry.email, max_retries,
+                                            retry.analysis, retry.attempt)] = index
+                
+                timeout = max(0.0, retries[0][0] - now) if retries else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    if future.exception() is not None:
+                        errors[index] = future.exception()
+                        continue
+                    retry = future.result()
+                    if retry is not None:
+                        heapq.heappush(retries, (retry.next_ts, index, retry))
+        
+        self._flush_gmail_actions(emails)
+        
+        # Every email has finished by now, so one failure doesn't stop the
+        # others; report the first failure in batch order
+        if errors:
+            raise errors[min(errors)]
+
+    def _queue_gmail_action(self, action: str, email_id: str) -> None:
+        """Queue a Gmail change ('trash', 'read' or 'unread') to apply with the rest of the batch."""
+        with self._gmail_actions_lock:
+            self._pending_gmail_actions[action].append(email_id)
+
+    def _flush_gmail_actions(self, emails: List[EmailContent]) -> None:
+        """Apply the batch's queued Gmail changes, with one bulk call per kind when there are several."""
+        with self._gmail_actions_lock:
+            actions, self._pending_gmail_actions = self._pending_gmail_actions, defaultdict(list)
+        
+        # Workers finish in any order; apply the changes in batch order
+        position = {email.email_id: index for index, email in enumerate(emails)}
+        handlers = (
+            ('trash', self.gmail.move_to_trash, self.gmail.trash_many),
+            ('read', self.gmail.mark_as_read, self.gmail.mark_many_as_read),
+            ('unread', self.gmail.mark_as_unread, self.gmail.mark_many_as_unread),
+        )
+        for action, single, bulk in handlers:
+            email_ids = sorted(actions.get(action, ()), key=lambda email_id: position.get(email_id, len(position)))
+            try:
+                if len(email_ids) == 1:
+                    single(email_ids[0])
+                elif email_ids:
+                    bulk(email_ids)
+            except Exception as e:
+                logger.error("Failed to apply Gmail action %s to %d emails: %s", action, len(email_ids), e)
+
+    def _flush_history(self) -> None:
+        """Write the processing history accumulated for the batch in one transaction."""
+        with self._history_lock:
+            if not self._pending_history:
+                return
+            records, self._pending_history = self._pending_history, []
+        try:
+            self.db.add_processing_history_bulk(records)
+        except Exception as e:
+            logger.error("Failed to record processing history for %d emails: %s", len(records), e)
+    
+    def _record_history(self, record: dict) -> None:
+        """Queue a processing history record, flushing once enough have accumulated."""
+        with self._history_lock:
+            self._pending_history.append(record)
+            full = len(self._pending_history) >= HISTORY_FLUSH_SIZE
+        if full:
+            self._flush_history()
     
-    def _process_single_email(self, email: EmailContent, max_retries: int) -> None:
-        """Process a single email with retries.
+    def _process_single_email(self, email: EmailContent, max_retries: int,
+                              analysis: Optional[EmailAnalysis] = None, attempt: int = 0) -> Optional[Retry]:
+        """Make one attempt at processing an email.
         
         Analyzes the email content and processes it based on the analysis results.
-        Implements retry logic for handling transient failures.
+        A failed attempt is not retried here; it is returned as a Retry due
+        after an exponential backoff, so the caller can schedule it without
+        holding a worker.
         
         Args:
             email: Email content to process
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts
+            analysis: Analysis from a batched request or an earlier attempt,
+                if available
+            attempt: Number of attempts already made
+            
+        Returns:
+            None on success, or the Retry to schedule after a failed attempt
             
         Raises:
-            EmailProcessingError: If processing fails after all retries
+            EmailProcessingError: If the last allowed attempt fails
         """
-        retries = 0
-        error_msg = None
-        while retries < max_retries:
-            try:
-                logger.debug(f"Processing attempt {retries + 1} for email {email.email_id}")
-                # Analyze email content
+        try:
+            logger.debug("Processing attempt %s for email %s", attempt + 1, email.email_id)
+            # Analyze email content unless a previous step already did
+            if analysis is None:
                 analysis = self.analyzer.analyze_email(email)
-                logger.debug(f"Analysis complete for email {email.email_id}: {analysis.category}")
-                
-                # Process based on category
-                if analysis.category == EmailCategory.NON_ESSENTIAL:
-                    self._handle_non_essential_email(email)
-                elif analysis.category == EmailCategory.SAVE_AND_SUMMARIZE:
-                    self._handle_save_and_summarize_email(email, analysis)
-                else:  # Important
-                    self._handle_important_email(email)
-                
-                # Log successful processing
-                self.db.add_processing_history(
-                    email_id=email.email_id,
-                    action="processed",
-                    category=analysis.category,
-                    confidence=analysis.confidence,
-                    success=True,
-                    reasoning=analysis.reasoning
-                )
-                logger.debug(f"Successfully processed email {email.email_id} on attempt {retries + 1}")
-                break  # Success, exit retry loop
-                
-            except Exception as e:
-                error_msg = str(e)
-                retries += 1
-                logger.warning(f"Attempt {retries} failed for email {email.email_id}: {error_msg}")
-                if retries == max_retries:
-                    logger.error(f"All {max_retries} attempts failed for email {email.email_id}")
-                    self._handle_processing_failure(email, error_msg)
-                    raise EmailProcessingError(f"Failed to process email after {max_retries} attempts: {error_msg}")
-                else:
-                    time.sleep(2 ** retries)  # Exponential backoff
+            logger.debug("Analysis complete for email %s: %s", email.email_id, analysis.category)
+            
+            # Process based on category
+            if analysis.category == EmailCategory.NON_ESSENTIAL:
+                self._handle_non_essential_email(email)
+            elif analysis.category == EmailCategory.SAVE_AND_SUMMARIZE:
+                self._handle_save_and_summarize_email(email, analysis)
+            else:  # Important
+                self._handle_important_email(email)
+            
+            # Log successful processing; written in bulk at the end of the batch
+            self._record_history(dict(
+                email_id=email.email_id,
+                action="processed",
+                category=analysis.category,
+                confidence=analysis.confidence,
+                success=True,
+                reasoning=analysis.reasoning
+            ))
+            logger.debug("Successfully processed email %s on attempt %s", email.email_id, attempt + 1)
+            return None
+            
+        except Exception as e:
+            error_msg = str(e)
+            attempt += 1
+            logger.warning("Attempt %d failed for email %s: %s", attempt, email.email_id, error_msg)
+            if attempt >= max_retries:
+                logger.error("All %d attempts failed for email %s", max_retries, email.email_id)
+                self._handle_processing_failure(email, error_msg)
+                raise EmailProcessingError(f"Failed to process email after {max_retries} attempts: {error_msg}")
+            # Exponential backoff
+            return Retry(email, attempt, time.monotonic() + 2 ** attempt, analysis)
     
     def _handle_non_essential_email(self, email: EmailContent) -> None:
         """Handle non-essential email processing.
         
-        Stores the email metadata in the database and moves it to trash.
+        Stores the email metadata in the database and queues it to be moved
+        to trash with the rest of the batch.
         
         Args:
             email: Email to process
@@ -140,7 +323,7 @@ class EmailManager:
         Raises:
             EmailProcessingError: If storage or trash operation fails
         """
-        logger.info(f"Processing non-essential email: {email.email_id}")
+        logger.info("Processing non-essential email: %s", email.email_id)
         
         # First store in database
         stored = self.db.store_deleted_email(
@@ -152,15 +335,16 @@ class EmailManager:
         
         if stored:
             # Move to trash only after successful database storage
-            self.gmail.move_to_trash(email.email_id)
-            logger.info(f"Non-essential email {email.email_id} stored in db and moved to trash")
+            self._queue_gmail_action('trash', email.email_id)
+            logger.info("Non-essential email %s stored in db and queued for trash", email.email_id)
         else:
             raise EmailProcessingError(f"Failed to store non-essential email {email.email_id}")
     
     def _handle_save_and_summarize_email(self, email: EmailContent, analysis: EmailAnalysis) -> None:
         """Handle emails that should be saved and summarized.
         
-        Archives the email content with its summary and moves original to trash.
+        Archives the email content with its summary and queues the original
+        to be moved to trash with the rest of the batch.
         
         Args:
             email: Email to process
@@ -169,19 +353,21 @@ class EmailManager:
         Raises:
             EmailProcessingError: If archiving or trash operation fails
         """
-        logger.info(f"Processing email to save and summarize: {email.email_id}")
+        logger.info("Processing email to save and summarize: %s", email.email_id)
         
-        # Generate summary for content
-        try:
-            summary = self.analyzer.generate_summary(email)
-            logger.debug(f"Generated summary for email: {summary}")
-            if summary is None:
-                raise EmailProcessingError("Failed to generate summary for email")
-        except (ClaudeAPIError, InsufficientCreditsError) as e:
-            raise EmailProcessingError(f"Failed to generate summary: {str(e)}")
+        # The analysis usually includes the summary; only request one if it doesn't
+        summary = analysis.summary
+        if summary is None:
+            try:
+                summary = self.analyzer.generate_summary(email)
+                logger.debug("Generated summary for email: %s", summary)
+                if summary is None:
+                    raise EmailProcessingError("Failed to generate summary for email")
+            except (ClaudeAPIError, InsufficientCreditsError) as e:
+                raise EmailProcessingError(f"Failed to generate summary: {str(e)}")
         
         # Store in saved email archive
-        logger.debug(f"Attempting to store saved content for email {email.email_id}")
+        logger.debug("Attempting to store saved content for email %s", email.email_id)
         stored = self.db.archive_saved_email(
             email_id=email.email_id,
             subject=email.subject,
@@ -191,12 +377,12 @@ class EmailManager:
             received_date=email.received_date,
             category=EmailCategory.SAVE_AND_SUMMARIZE
         )
-        logger.debug(f"Store saved content result for {email.email_id}: {stored}")
+        logger.debug("Store saved content result for %s: %s", email.email_id, stored)
         
         if stored:
             # Move to trash only after successful archiving
-            self.gmail.move_to_trash(email.email_id)
-            logger.info(f"Email {email.email_id} archived and moved to trash")
+            self._queue_gmail_action('trash', email.email_id)
+            logger.info("Email %s archived and queued for trash", email.email_id)
         else:
             error_msg = f"Failed to archive email {email.email_id}"
             logger.error(error_msg)
@@ -205,16 +391,16 @@ class EmailManager:
     def _handle_important_email(self, email: EmailContent) -> None:
         """Handle important email processing.
         
-        Marks the email as read but keeps it in the inbox.
+        Queues the email to be marked as read but keeps it in the inbox.
         
         Args:
             email: Email to process
         """
-        logger.info(f"Processing important email: {email.email_id}")
+        logger.info("Processing important email: %s", email.email_id)
         
         # Mark as read but don't delete
-        self.gmail.mark_as_read(email.email_id)
-        logger.info(f"Important email {email.email_id} marked as read")
+        self._queue_gmail_action('read', email.email_id)
+        logger.info("Important email %s queued to be marked as read", email.email_id)
     
     def _handle_processing_failure(self, email: EmailContent, error_message: str) -> None:
         """Handle email processing failure.
@@ -225,10 +411,10 @@ class EmailManager:
             email: Failed email
             error_message: Description of the failure
         """
-        logger.error(f"Failed to process email {email.email_id} after all retries: {error_message}")
+        logger.error("Failed to process email %s after all retries: %s", email.email_id, error_message)
         
-        # Log the failure
-        self.db.add_processing_history(
+        # Log the failure; written with the rest of the batch's history
+        self._record_history(dict(
             email_id=email.email_id,
             action="failed",
             category=EmailCategory.IMPORTANT,  # Default to important on failure
@@ -236,10 +422,7 @@ class EmailManager:
             success=False,
             error_message=error_message,
             reasoning="Failed to process email"
-        )
+        ))
         
         # Mark as unread so it can be processed in next batch
-        try:
-            self.gmail.mark_as_unread(email.email_id)
-        except Exception as e:
-            logger.error(f"Failed to mark failed email as unread: {e}")
+        self._queue_gmail_action('unread', email.email_id)
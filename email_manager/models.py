@@ -4,7 +4,7 @@ from typing import Optional
 
 from email_manager.database.models import EmailCategory
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EmailContent:
     """Data class for email content"""
     email_id: str
@@ -13,7 +13,7 @@ class EmailContent:
     content: str
     received_date: datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class EmailAnalysis:
     """Data class for email analysis results"""
     category: EmailCategory
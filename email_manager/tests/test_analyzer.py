@@ -1,12 +1,14 @@
+import asyncio
 from datetime import datetime
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
 import unittest
 import logging
 
 from anthropic import APIError
 
 from ..models import EmailContent
-from ..database.models import EmailCategory, Base
+from ..database.models import EmailCategory, Base, AnalysisCacheEntry
 from ..analyzer.analyzer import EmailAnalyzer
 from ..analyzer.models import InsufficientCreditsError
 from ..logger import get_logger
@@ -15,16 +17,38 @@ from ..database.manager import DatabaseManager
 # Set log level for all loggers to reduce noise during tests
 logging.getLogger('email_manager').setLevel(logging.WARNING)
 
+# Responses are plain namespaces rather than MagicMocks; they only need the
+# attributes the analyzer reads and are much cheaper to build
+def tool_response(tool_name, tool_input):
+    """Build a fake Claude response that calls the given tool."""
+    return SimpleNamespace(content=[SimpleNamespace(type='tool_use', name=tool_name, input=tool_input)])
+
+def text_response(text):
+    """Build a fake Claude response containing only text."""
+    return SimpleNamespace(content=[SimpleNamespace(type='text', text=text)])
+
 class TestEmailAnalyzer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """Build the canonical Claude responses shared by the tests."""
+        cls.IMPORTANT_RESPONSE = tool_response(
+            'classify_email', {"c": "important", "p": 0.95, "r": "Urgent business matter"}
+        )
+        cls.NON_ESSENTIAL_RESPONSE = tool_response(
+            'classify_email', {"c": "non_essential", "p": 0.95, "r": "Marketing newsletter"}
+        )
+        cls.INVALID_RESPONSE = text_response('invalid json')
+
     def setUp(self):
         """Set up test environment."""
         self.claude_api = MagicMock()
         self.db_manager = DatabaseManager()
         self.email_analyzer = EmailAnalyzer(self.claude_api, self.db_manager)
         
-        # Initialize database tables
+        # Initialize database tables and drop analyses cached by earlier tests
         with self.db_manager.get_session() as session:
             Base.metadata.create_all(session.get_bind())
+            session.query(AnalysisCacheEntry).delete()
 
         # Create a test email
         self.test_email = EmailContent(
@@ -35,21 +59,14 @@ class TestEmailAnalyzer(unittest.TestCase):
             received_date=datetime.now()
         )
 
+    @patch.object(EmailAnalyzer, '_client', None)
     @patch('email_manager.analyzer.analyzer.Anthropic')
-    def test_important_email_categorization(self, mock_anthropic_class):
-        """Test categorization of important emails."""
+    def test_important_email_categorization_with_default_client(self, mock_anthropic_class):
+        """Test categorization of important emails with the shared Claude client."""
         # Create a mock response that mimics the Anthropic API response
-        mock_response = MagicMock()
-        mock_response.content = [
-            MagicMock(
-                text='{"category": "important", "confidence": 0.95, "reasoning": "Urgent business matter"}',
-                type='text'
-            )
-        ]
-        
         # Set up the mock client
         mock_client = MagicMock()
-        mock_client.messages.create.return_value = mock_response
+        mock_client.messages.create.return_value = self.IMPORTANT_RESPONSE
         mock_anthropic_class.return_value = mock_client
 
         # Create analyzer and analyze email
@@ -59,35 +76,41 @@ class TestEmailAnalyzer(unittest.TestCase):
         # Verify the mock was called correctly
         mock_client.messages.create.assert_called_once()
         call_kwargs = mock_client.messages.create.call_args.kwargs
-        self.assertEqual(call_kwargs['model'], analyzer.model)
-        self.assertEqual(call_kwargs['max_tokens'], 1000)
+        self.assertEqual(call_kwargs['model'], analyzer.triage_model)
+        self.assertEqual(call_kwargs['max_tokens'], 520)
         self.assertIsInstance(call_kwargs['messages'], list)
+        self.assertEqual(call_kwargs['tool_choice'], {"type": "tool", "name": "classify_email"})
 
         # Verify result
         self.assertEqual(result.category, EmailCategory.IMPORTANT)
         self.assertGreater(result.confidence, 0.9)
         self.assertTrue(result.reasoning)
 
+        # Later analyzers reuse the same client
+        self.assertIs(EmailAnalyzer().client, mock_client)
+        mock_anthropic_class.assert_called_once()
+
     @patch('email_manager.analyzer.analyzer.Anthropic')
     def test_save_and_summarize_categorization(self, mock_anthropic_class):
-        """Test categorization of emails that should be saved and summarized."""
+        """Test that saved emails are categorized and summarized in one request."""
         # Mock Claude API response
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text='{"category": "save_and_summarize", "confidence": 0.95, "reasoning": "Contains important technical information"}')]
-        self.claude_api.messages.create.return_value = mock_response
+        self.claude_api.messages.create.return_value = tool_response('classify_email', {
+            "c": "save_and_summarize", "p": 0.95, "r": "Contains important technical information",
+            "s": ["New API released", "Old endpoints deprecated"]
+        })
 
         result = self.email_analyzer.analyze_email(self.test_email)
+        self.assertEqual(self.claude_api.messages.create.call_count, 1)
         self.assertEqual(result.category, EmailCategory.SAVE_AND_SUMMARIZE)
         self.assertGreater(result.confidence, 0.9)
         self.assertIsNotNone(result.reasoning)
+        self.assertEqual(result.summary, "• New API released\n• Old endpoints deprecated")
 
     @patch('email_manager.analyzer.analyzer.Anthropic')
     def test_non_essential_email_categorization(self, mock_anthropic_class):
         """Test categorization of non-essential emails."""
         # Mock Claude API response
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text='{"category": "non_essential", "confidence": 0.95, "reasoning": "Marketing newsletter"}')]
-        self.claude_api.messages.create.return_value = mock_response
+        self.claude_api.messages.create.return_value = self.NON_ESSENTIAL_RESPONSE
 
         result = self.email_analyzer.analyze_email(self.test_email)
         self.assertEqual(result.category, EmailCategory.NON_ESSENTIAL)
@@ -98,15 +121,171 @@ class TestEmailAnalyzer(unittest.TestCase):
     def test_important_email_categorization(self, mock_anthropic_class):
         """Test categorization of important emails."""
         # Mock Claude API response
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text='{"category": "important", "confidence": 0.95, "reasoning": "Urgent business matter"}')]
-        self.claude_api.messages.create.return_value = mock_response
+        self.claude_api.messages.create.return_value = self.IMPORTANT_RESPONSE
 
         result = self.email_analyzer.analyze_email(self.test_email)
         self.assertEqual(result.category, EmailCategory.IMPORTANT)
         self.assertGreater(result.confidence, 0.9)
         self.assertIsNotNone(result.reasoning)
 
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_static_instructions_are_system_prompt(self, mock_anthropic_class):
+        """Test that the static instructions are sent as the system prompt, apart from the email."""
+        self.claude_api.messages.create.return_value = self.IMPORTANT_RESPONSE
+
+        self.email_analyzer.analyze_email(self.test_email)
+
+        call_kwargs = self.claude_api.messages.create.call_args.kwargs
+        self.assertNotIn('cache_control', call_kwargs['system'][0])
+        user_text = call_kwargs['messages'][0]['content'][0]['text']
+        self.assertIn(self.test_email.subject, user_text)
+        self.assertNotIn(self.test_email.subject, call_kwargs['system'][0]['text'])
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_repeated_email_uses_cache(self, mock_anthropic_class):
+        """Test that an identical email is not sent to Claude twice."""
+        self.claude_api.messages.create.return_value = tool_response('classify_email', {"c": "non_essential", "p": 0.9, "r": "Daily digest"})
+
+        first = self.email_analyzer.analyze_email(self.test_email)
+        second = self.email_analyzer.analyze_email(self.test_email)
+
+        self.claude_api.messages.create.assert_called_once()
+        self.assertEqual(second, first)
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_cached_analysis_survives_restart(self, mock_anthropic_class):
+        """Test that a new analyzer reuses analyses persisted by an earlier one."""
+        self.claude_api.messages.create.return_value = tool_response(
+            'classify_email', {"c": "non_essential", "p": 0.9, "r": "Daily digest"}
+        )
+        self.email_analyzer.analyze_email(self.test_email)
+
+        fresh_client = MagicMock()
+        restarted = EmailAnalyzer(fresh_client, self.db_manager)
+        result = restarted.analyze_email(self.test_email)
+
+        fresh_client.messages.create.assert_not_called()
+        self.assertEqual(result.category, EmailCategory.NON_ESSENTIAL)
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_marketing_email_skips_claude(self, mock_anthropic_class):
+        """Test that obvious marketing mail is classified without calling Claude."""
+        marketing_email = EmailContent(
+            email_id="promo123",
+            subject="50% off everything",
+            sender="Store Deals <deals@store.example.com>",
+            content="Shop now. Click here to unsubscribe.",
+            received_date=datetime.now()
+        )
+
+        result = self.email_analyzer.analyze_email(marketing_email)
+
+        self.claude_api.messages.create.assert_not_called()
+        self.assertEqual(result.category, EmailCategory.NON_ESSENTIAL)
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_batch_analysis(self, mock_anthropic_class):
+        """Test that a batched response is mapped back to emails by index."""
+        second_email = EmailContent(
+            email_id="test456",
+            subject="Weekly Deals",
+            sender="deals@example.com",
+            content="Save 50% this week",
+            received_date=datetime.now()
+        )
+        self.claude_api.messages.create.return_value = tool_response(
+            'classify_emails',
+            {"results": [{"i": 1, "c": "non_essential", "p": 0.9, "r": "Promotion"}]}
+        )
+
+        results = self.email_analyzer.analyze_emails([self.test_email, second_email])
+
+        self.claude_api.messages.create.assert_called_once()
+        self.assertEqual(len(results), 2)
+        self.assertIsNone(results[0])
+        self.assertEqual(results[1].category, EmailCategory.NON_ESSENTIAL)
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_batch_analysis_reads_and_writes_cache_in_bulk(self, mock_anthropic_class):
+        """Test that a batch makes one cache lookup and one cache write, not one per email."""
+        emails = [
+            EmailContent(email_id=f"digest{i}", subject=f"Digest {i}", sender="digest@example.com",
+                         content=f"Issue {i}", received_date=datetime.now())
+            for i in range(3)
+        ]
+        self.claude_api.messages.create.return_value = tool_response('classify_emails', {"results": [
+            {"i": i, "c": "non_essential", "p": 0.9, "r": "Digest"} for i in range(3)
+        ]})
+
+        with patch.object(self.db_manager, 'store_cached_analyses',
+                          wraps=self.db_manager.store_cached_analyses) as store:
+            self.email_analyzer.analyze_emails(emails)
+        store.assert_called_once()
+        self.assertEqual(len(store.call_args.args[0]), 3)
+
+        fresh_client = MagicMock()
+        restarted = EmailAnalyzer(fresh_client, self.db_manager)
+        with patch.object(self.db_manager, 'get_cached_analyses',
+                          wraps=self.db_manager.get_cached_analyses) as lookup:
+            results = restarted.analyze_emails(emails)
+
+        lookup.assert_called_once()
+        fresh_client.messages.create.assert_not_called()
+        self.assertTrue(all(result.category == EmailCategory.NON_ESSENTIAL for result in results))
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_async_analysis(self, mock_anthropic_class):
+        """Test that the async path categorizes and summarizes with the async client."""
+        async_client = MagicMock()
+        async_client.messages.create = AsyncMock(return_value=tool_response('classify_email', {
+            "c": "save_and_summarize", "p": 0.95, "r": "Tech newsletter", "s": ["New model released"]
+        }))
+        async_client.close = AsyncMock()
+        analyzer = EmailAnalyzer(self.claude_api, self.db_manager, async_claude_client=async_client)
+
+        async def run():
+            try:
+                return await analyzer.analyze_email_async(self.test_email)
+            finally:
+                await analyzer.aclose()
+
+        result = asyncio.run(run())
+
+        async_client.messages.create.assert_awaited_once()
+        async_client.close.assert_awaited_once()
+        self.claude_api.messages.create.assert_not_called()
+        self.assertEqual(result.category, EmailCategory.SAVE_AND_SUMMARIZE)
+        self.assertEqual(result.summary, "• New model released")
+
+    @patch('email_manager.analyzer.analyzer.Anthropic')
+    def test_async_batch_analysis_is_bounded(self, mock_anthropic_class):
+        """Test that concurrent analysis never exceeds the concurrency limit."""
+        in_flight = 0
+        peak = 0
+
+        async def create(**kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return tool_response('classify_email', {"c": "important", "p": 0.9, "r": "Bill"})
+
+        async_client = MagicMock()
+        async_client.messages.create = create
+        analyzer = EmailAnalyzer(self.claude_api, self.db_manager, async_claude_client=async_client)
+        emails = [
+            EmailContent(email_id=f"bill{i}", subject=f"Bill {i}", sender="billing@example.com",
+                         content=f"Amount due: {i}", received_date=datetime.now())
+            for i in range(4)
+        ]
+
+        results = asyncio.run(analyzer.analyze_emails_async(emails, max_concurrency=2))
+
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result.category == EmailCategory.IMPORTANT for result in results))
+        self.assertLessEqual(peak, 2)
+
     @patch('email_manager.analyzer.analyzer.Anthropic')
     def test_insufficient_credits_handling(self, mock_anthropic_class):
         """Test handling of insufficient credits error."""
@@ -133,10 +312,8 @@ class TestEmailAnalyzer(unittest.TestCase):
     @patch('email_manager.analyzer.analyzer.Anthropic')
     def test_invalid_response_handling(self, mock_anthropic_class):
         """Test handling of invalid API responses."""
-        # Mock Claude API response with invalid JSON
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text='invalid json')]
-        self.claude_api.messages.create.return_value = mock_response
+        # Mock Claude API response that answers in text instead of calling the tool
+        self.claude_api.messages.create.return_value = self.INVALID_RESPONSE
 
         result = self.email_analyzer.analyze_email(self.test_email)
         self.assertEqual(result.category, EmailCategory.IMPORTANT)
@@ -180,10 +357,8 @@ class TestEmailAnalyzer(unittest.TestCase):
     @patch('email_manager.analyzer.analyzer.Anthropic')
     def test_invalid_json_response(self, mock_anthropic_class):
         """Test handling of invalid JSON response."""
-        # Mock Claude API response with invalid JSON
-        mock_response = MagicMock()
-        mock_response.content = [MagicMock(text='invalid json')]
-        self.claude_api.messages.create.return_value = mock_response
+        # Mock Claude API response that answers in text instead of calling the tool
+        self.claude_api.messages.create.return_value = self.INVALID_RESPONSE
 
         result = self.email_analyzer.analyze_email(self.test_email)
         self.assertEqual(result.category, EmailCategory.IMPORTANT)
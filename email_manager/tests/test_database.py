@@ -1,20 +1,59 @@
+import asyncio
 import os
 import unittest
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 from datetime import datetime, timezone
+from typing import Optional
 from unittest.mock import patch
 from uuid import UUID
 
 import psycopg2
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, delete, event, select, text
 from sqlalchemy.orm import sessionmaker
 
 from ..config import config
 from ..database.manager import DatabaseManager
 from ..database.models import Base, DeletedEmail, EmailCategory, SavedEmail, ProcessingHistory
 
+@dataclass(frozen=True, slots=True)
+class EmailSnapshot:
+    """The stored fields of an email row, compared in one assertion."""
+    email_id: str
+    subject: str
+    sender: str
+    content: Optional[str]
+    summary: Optional[str] = None
+    received_date: Optional[datetime] = None
+    category: Optional[EmailCategory] = None
+
+    @classmethod
+    def of(cls, row) -> "EmailSnapshot":
+        """Snapshot a DeletedEmail or SavedEmail; fields a model lacks are None."""
+        return cls(*(getattr(row, field.name, None) for field in fields(cls)))
+
+@contextmanager
+def count_queries(engine):
+    """Count the statements executed on an engine within the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Savepoints come from the test transaction, not the code under test
+        if 'SAVEPOINT' not in statement:
+            statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
 class TestDatabaseManager(unittest.TestCase):
     """Test cases for DatabaseManager class"""
 
+    # Fixed so stored dates can be compared exactly
+    RECEIVED_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
     @classmethod
     def setUpClass(cls):
         """Set up test database schema"""
@@ -24,27 +63,46 @@ class TestDatabaseManager(unittest.TestCase):
         # Create database manager with the test schema
         cls.db_manager = DatabaseManager(schema=cls.test_schema)
         
-        # Create test schema
+        # The test schema is kept between runs so its tables are only created
+        # once; set TEST_DB_RESET_SCHEMA=1 to rebuild it after schema changes.
+        # Connections already set their search_path to it.
         with cls.db_manager.engine.connect() as conn:
-            conn.execute(text(f"DROP SCHEMA IF EXISTS {cls.test_schema} CASCADE"))
-            conn.execute(text(f"CREATE SCHEMA {cls.test_schema}"))
-            conn.execute(text(f"SET search_path TO {cls.test_schema}, public"))
+            if os.getenv('TEST_DB_RESET_SCHEMA'):
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {cls.test_schema} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {cls.test_schema}"))
             conn.commit()
         
-        # Create tables using the manager's create_tables method
+        # Runs the initialization script only if the tables don't exist yet, then
+        # drops anything an interrupted run left behind
         cls.db_manager.create_tables()
+        cls.db_manager.clear_tables()
+
+        # Every test runs in a transaction on this connection that is rolled back
+        # afterwards, so tests don't need to clean up after each other
+        cls._conn = cls.db_manager.engine.connect()
 
     @classmethod
     def tearDownClass(cls):
-        """Clean up test schema"""
-        with cls.db_manager.engine.connect() as conn:
-            conn.execute(text(f"DROP SCHEMA IF EXISTS {cls.test_schema} CASCADE"))
-            conn.commit()
+        """Release the test connection; the schema is kept for the next run"""
+        cls._conn.close()
         cls.db_manager.engine.dispose()
 
     def setUp(self):
         """Set up test case"""
+        self._transaction = self._conn.begin()
         self.db_manager = DatabaseManager(schema=self.test_schema)
+        # Sessions join the test transaction; their commits only release a savepoint
+        self.db_manager.SessionLocal = sessionmaker(
+            bind=self._conn, join_transaction_mode="create_savepoint",
+            expire_on_commit=False, autoflush=False
+        )
+        # Assertions read back through one session for the whole test
+        self.session = self.db_manager.SessionLocal()
+
+    def tearDown(self):
+        """Discard everything the test wrote"""
+        self.session.close()
+        self._transaction.rollback()
 
     def test_store_deleted_email(self):
         """Test storing deleted email metadata"""
@@ -57,12 +115,60 @@ class TestDatabaseManager(unittest.TestCase):
         self.db_manager.store_deleted_email(email_id, subject, sender, content)
 
         # Verify storage
-        with self.db_manager.get_session() as session:
-            deleted_email = session.query(DeletedEmail).filter_by(email_id=email_id).first()
-            self.assertIsNotNone(deleted_email)
-            self.assertEqual(deleted_email.subject, subject)
-            self.assertEqual(deleted_email.sender, sender)
-            self.assertEqual(deleted_email.content, content)
+        deleted_email = self.session.scalars(select(DeletedEmail).where(DeletedEmail.email_id == email_id)).one_or_none()
+        self.assertIsNotNone(deleted_email)
+        self.assertEqual(
+            EmailSnapshot.of(deleted_email),
+            EmailSnapshot(email_id, subject, sender, content)
+        )
+
+    def test_store_deleted_emails_bulk(self):
+        """Test storing several deleted emails with one COPY"""
+        records = [
+            dict(email_id="copydel1", subject="Sale", sender="deals@example.com", content="50% off"),
+            dict(email_id="copydel2", subject="Promo", sender="promo@example.com"),
+        ]
+
+        record_ids = self.db_manager.store_deleted_emails_bulk(records)
+
+        self.assertEqual(len(record_ids), 2)
+        self.assertEqual(self.db_manager.get_deleted_email("copydel1").content, "50% off")
+        self.assertIsNone(self.db_manager.get_deleted_email("copydel2").content)
+
+    def test_async_store_and_archive(self):
+        """Test writing and reading emails through the async manager"""
+        try:
+            import asyncpg  # noqa: F401
+            import greenlet  # noqa: F401
+        except ImportError as e:
+            self.skipTest(f"Async database support is not installed: {e}")
+        from ..database.async_manager import AsyncDatabaseManager
+
+        async def run():
+            async_manager = AsyncDatabaseManager(schema=self.test_schema)
+            try:
+                await async_manager.store_deleted_email("async123", "Sale", "deals@example.com")
+                record_ids = await async_manager.archive_saved_emails_bulk([dict(
+                    email_id="async456", subject="Release", sender="dev@example.com",
+                    content="Notes", summary="Summary", received_date=self.RECEIVED_DATE
+                )])
+                return (
+                    await async_manager.get_deleted_email("async123"),
+                    await async_manager.get_saved_email("async456"),
+                    record_ids
+                )
+            finally:
+                # The async manager commits for real, outside the test transaction
+                async with async_manager.get_session() as session:
+                    await session.execute(delete(DeletedEmail).where(DeletedEmail.email_id == "async123"))
+                    await session.execute(delete(SavedEmail).where(SavedEmail.email_id == "async456"))
+                await async_manager.dispose()
+
+        deleted_email, saved_email, record_ids = asyncio.run(run())
+
+        self.assertEqual(deleted_email.subject, "Sale")
+        self.assertEqual(saved_email.id, record_ids[0])
+        self.assertEqual(saved_email.category, EmailCategory.SAVE_AND_SUMMARIZE)
 
     def test_archive_saved_email(self):
         """Test archiving email content that should be saved"""
@@ -71,7 +177,7 @@ class TestDatabaseManager(unittest.TestCase):
         sender = "updates@example.com"
         content = "Important project update"
         summary = "Project summary"
-        received_date = datetime.now(timezone.utc)
+        received_date = self.RECEIVED_DATE
         category = EmailCategory.SAVE_AND_SUMMARIZE
 
         # Archive email content
@@ -80,14 +186,12 @@ class TestDatabaseManager(unittest.TestCase):
         )
 
         # Verify archive
-        with self.db_manager.get_session() as session:
-            saved_email = session.query(SavedEmail).filter_by(email_id=email_id).first()
-            self.assertIsNotNone(saved_email)
-            self.assertEqual(saved_email.subject, subject)
-            self.assertEqual(saved_email.sender, sender)
-            self.assertEqual(saved_email.content, content)
-            self.assertEqual(saved_email.summary, summary)
-            self.assertEqual(saved_email.category, category)
+        saved_email = self.session.scalars(select(SavedEmail).where(SavedEmail.email_id == email_id)).one_or_none()
+        self.assertIsNotNone(saved_email)
+        self.assertEqual(
+            EmailSnapshot.of(saved_email),
+            EmailSnapshot(email_id, subject, sender, content, summary, received_date, category)
+        )
 
     def test_get_saved_email(self):
         """Test retrieving archived email content"""
@@ -97,7 +201,7 @@ class TestDatabaseManager(unittest.TestCase):
         sender = "project@example.com"
         content = "Project updates"
         summary = "Project summary"
-        received_date = datetime.now(timezone.utc)
+        received_date = self.RECEIVED_DATE
         category = EmailCategory.SAVE_AND_SUMMARIZE
 
         self.db_manager.archive_saved_email(
@@ -105,12 +209,61 @@ class TestDatabaseManager(unittest.TestCase):
         )
 
         # Retrieve and verify
-        with self.db_manager.get_session() as session:
-            saved_email = session.query(SavedEmail).filter_by(email_id=email_id).first()
-            self.assertIsNotNone(saved_email)
-            self.assertEqual(saved_email.email_id, email_id)
-            self.assertEqual(saved_email.subject, subject)
-            self.assertEqual(saved_email.content, content)
+        saved_email = self.session.scalars(select(SavedEmail).where(SavedEmail.email_id == email_id)).one_or_none()
+        self.assertIsNotNone(saved_email)
+        self.assertEqual(
+            EmailSnapshot.of(saved_email),
+            EmailSnapshot(email_id, subject, sender, content, summary, received_date, category)
+        )
+
+    def test_archive_saved_emails_bulk(self):
+        """Test archiving several emails with one COPY"""
+        received_date = self.RECEIVED_DATE
+        records = [
+            dict(email_id="copy1", subject="Release\tnotes", sender="dev@example.com",
+                 content="Line one\nLine two\\", summary="Summary", received_date=received_date),
+            dict(email_id="copy2", subject="Digest", sender="digest@example.com",
+                 content="Content", summary="Summary", received_date=received_date,
+                 category=EmailCategory.IMPORTANT),
+        ]
+
+        record_ids = self.db_manager.archive_saved_emails_bulk(records)
+
+        self.assertEqual(len(record_ids), 2)
+        saved_email = self.db_manager.get_saved_email("copy1")
+        self.assertEqual(saved_email.id, record_ids[0])
+        self.assertEqual(saved_email.subject, "Release\tnotes")
+        self.assertEqual(saved_email.content, "Line one\nLine two\\")
+        self.assertEqual(saved_email.category, EmailCategory.SAVE_AND_SUMMARIZE)
+        self.assertEqual(self.db_manager.get_saved_email("copy2").category, EmailCategory.IMPORTANT)
+
+    def test_archive_saved_email_with_naive_date(self):
+        """Test that naive received dates are stored as UTC"""
+        email_id = "naive123"
+        self.db_manager.archive_saved_email(
+            email_id, "Naive Date", "updates@example.com", "Content", "Summary",
+            datetime(2024, 1, 1, 12, 0)
+        )
+
+        saved_email = self.db_manager.get_saved_email(email_id)
+        self.assertEqual(saved_email.received_date, datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc))
+
+    def test_list_saved_emails_pages(self):
+        """Test paging through saved emails newest first"""
+        self.db_manager.clear_tables()
+        received_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for index in range(5):
+            self.db_manager.archive_saved_email(
+                f"page{index}", f"Update {index}", "updates@example.com", "Content",
+                "Summary", received_date.replace(day=index + 1), EmailCategory.SAVE_AND_SUMMARIZE
+            )
+
+        first_page, cursor = self.db_manager.list_saved_emails(limit=3)
+        second_page, last_cursor = self.db_manager.list_saved_emails(limit=3, before=cursor)
+
+        self.assertEqual([email.email_id for email in first_page], ["page4", "page3", "page2"])
+        self.assertEqual([email.email_id for email in second_page], ["page1", "page0"])
+        self.assertIsNone(last_cursor)
 
     def test_record_processing(self):
         """Test recording email processing history"""
@@ -164,14 +317,30 @@ class TestDatabaseManager(unittest.TestCase):
             session.commit()
 
         # Get history
-        with self.db_manager.get_session() as session:
-            history = session.query(ProcessingHistory).filter_by(email_id=email_id).all()
-            self.assertIsNotNone(history)
-            self.assertEqual(len(history), 1)
-            latest_record = history[0]
-            self.assertEqual(latest_record.email_id, email_id)
-            self.assertEqual(latest_record.action, action)
-            self.assertEqual(latest_record.category, category)
+        history = self.session.scalars(select(ProcessingHistory).where(ProcessingHistory.email_id == email_id)).all()
+        self.assertIsNotNone(history)
+        self.assertEqual(len(history), 1)
+        latest_record = history[0]
+        self.assertEqual(latest_record.email_id, email_id)
+        self.assertEqual(latest_record.action, action)
+        self.assertEqual(latest_record.category, category)
+
+    def test_get_processing_history_single_query(self):
+        """Test that reading history issues one statement regardless of row count"""
+        email_id = "count123"
+        self.db_manager.add_processing_history_bulk([
+            dict(email_id=email_id, action=action, category=EmailCategory.IMPORTANT,
+                 confidence=0.9, success=True)
+            for action in ("analyzed", "processed", "marked_read")
+        ])
+
+        with count_queries(self.db_manager.engine) as statements:
+            history = self.db_manager.get_processing_history(email_id)
+            # Attributes are already loaded on the detached records
+            actions = [record.action for record in history]
+
+        self.assertEqual(len(actions), 3)
+        self.assertEqual(len(statements), 1)
 
     def test_add_processing_history(self):
         """Test adding processing history."""
@@ -229,47 +398,111 @@ class TestDatabaseManager(unittest.TestCase):
             self.assertEqual(history.success, success)
             self.assertEqual(history.error_message, error_message)
 
+    def test_add_processing_history_bulk(self):
+        """Test adding several processing history records in one insert."""
+        email_id = "bulk123"
+        records = [
+            dict(email_id=email_id, action="analyzed", category=EmailCategory.NON_ESSENTIAL,
+                 confidence=0.9, success=True, reasoning="Promotion"),
+            dict(email_id=email_id, action="deleted", category=EmailCategory.NON_ESSENTIAL,
+                 confidence=0.9, success=True, reasoning=None),
+        ]
+
+        inserted = self.db_manager.add_processing_history_bulk(records)
+
+        self.assertEqual(inserted, 2)
+        history = self.db_manager.get_processing_history(email_id)
+        self.assertEqual({record.action for record in history}, {"analyzed", "deleted"})
+        self.assertTrue(all(isinstance(record.id, UUID) for record in history))
+
+    def test_ensure_history_partitions_moves_default_rows(self):
+        """Test that a month already holding rows in the default partition still gets its partition"""
+        # Past the partitions created with the tables, so the row lands in the default partition
+        today = datetime.now(timezone.utc)
+        month = today.month - 1 + 6
+        processing_date = datetime(today.year + month // 12, month % 12 + 1, 15, tzinfo=timezone.utc)
+        self.session.add(ProcessingHistory(
+            email_id="future123", processing_date=processing_date, action="analyzed",
+            category=EmailCategory.IMPORTANT, confidence=0.9, success=True
+        ))
+        self.session.commit()
+
+        self.db_manager.ensure_history_partitions(months_ahead=6)
+
+        partition = f"processing_history_{processing_date:%Y_%m}"
+        counts = self.session.execute(text(
+            f"SELECT (SELECT count(*) FROM {partition} WHERE email_id = 'future123'),"
+            " (SELECT count(*) FROM processing_history_default WHERE email_id = 'future123')"
+        )).one()
+        self.assertEqual(tuple(counts), (1, 0))
+        self.assertEqual(len(self.db_manager.get_processing_history("future123")), 1)
+
+    def test_create_tables_keeps_existing_data(self):
+        """Test that creating tables again does not rerun the initialization script"""
+        email_id = "keep123"
+        self.db_manager.store_deleted_email(email_id, "Keep Me", "keep@example.com")
+
+        self.db_manager.create_tables()
+
+        self.assertIsNotNone(self.db_manager.get_deleted_email(email_id))
+
+    def test_get_processing_history_many(self):
+        """Test fetching the history of several emails in one query"""
+        records = [
+            dict(email_id="many1", action="analyzed", category=EmailCategory.IMPORTANT,
+                 confidence=0.9, success=True),
+            dict(email_id="many1", action="processed", category=EmailCategory.IMPORTANT,
+                 confidence=0.9, success=True),
+            dict(email_id="many2", action="analyzed", category=EmailCategory.NON_ESSENTIAL,
+                 confidence=0.8, success=True),
+        ]
+        self.db_manager.add_processing_history_bulk(records)
+
+        history = self.db_manager.get_processing_history_many(["many1", "many2", "missing"])
+
+        self.assertEqual(set(history), {"many1", "many2"})
+        self.assertEqual(len(history["many1"]), 2)
+        self.assertEqual(history["many2"][0].action, "analyzed")
+
     def test_clear_tables(self):
         """Test clearing all tables in the database"""
-        # First add some data
+        # First add some data, in a single transaction
         email_id = "test123"
-        
-        # Add deleted email
-        self.db_manager.store_deleted_email(
-            email_id, "Test Clear", "clear@example.com", "Clear content"
-        )
-        
-        # Add saved email
-        self.db_manager.archive_saved_email(
-            email_id,
-            "Clear Saved",
-            "clear@example.com",
-            "Clear saved content",
-            "Clear summary",
-            datetime.now(timezone.utc),
-            EmailCategory.SAVE_AND_SUMMARIZE
-        )
-        
-        # Add processing history
-        with self.db_manager.get_session() as session:
-            self.db_manager.add_processing_history(
+        self.db_manager.bulk_seed(
+            deleted=[dict(
+                email_id=email_id,
+                subject="Test Clear",
+                sender="clear@example.com",
+                content="Clear content"
+            )],
+            saved=[dict(
+                email_id=email_id,
+                subject="Clear Saved",
+                sender="clear@example.com",
+                content="Clear saved content",
+                summary="Clear summary",
+                received_date=self.RECEIVED_DATE,
+                category=EmailCategory.SAVE_AND_SUMMARIZE
+            )],
+            history=[dict(
                 email_id=email_id,
                 action="deleted",
                 category=EmailCategory.NON_ESSENTIAL,
                 confidence=0.95,
-                success=True,
-                session=session
-            )
-            session.commit()
+                success=True
+            )]
+        )
+        self.assertEqual(self.session.query(DeletedEmail).count(), 1)
+        self.assertEqual(self.session.query(SavedEmail).count(), 1)
+        self.assertEqual(self.session.query(ProcessingHistory).count(), 1)
         
         # Clear tables
         self.db_manager.clear_tables()
         
         # Verify all tables are empty
-        with self.db_manager.get_session() as session:
-            self.assertEqual(session.query(DeletedEmail).count(), 0)
-            self.assertEqual(session.query(SavedEmail).count(), 0)
-            self.assertEqual(session.query(ProcessingHistory).count(), 0)
+        self.assertEqual(self.session.query(DeletedEmail).count(), 0)
+        self.assertEqual(self.session.query(SavedEmail).count(), 0)
+        self.assertEqual(self.session.query(ProcessingHistory).count(), 0)
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,8 +4,7 @@ Testing non-essential, save-and-summarize, important email processing, error han
 edge cases, and infrastructure failures.
 """
 import unittest
-from datetime import datetime
-import pytz
+from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 import os
 
@@ -15,6 +14,18 @@ from email_manager.models import EmailContent, EmailAnalysis
 
 class TestEmailManagerE2E(unittest.TestCase):
     """End-to-end test suite for the Email Manager system."""
+
+    # Fixed so results don't depend on when the tests run
+    RECEIVED_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    
+    # Sample test data; EmailContent is frozen, so tests can share it
+    TEST_EMAIL = EmailContent(
+        email_id="test123",
+        subject="Test Email",
+        sender="test@example.com",
+        content="This is a test email content",
+        received_date=RECEIVED_DATE
+    )
     
     @classmethod
     def setUpClass(cls):
@@ -34,9 +45,14 @@ class TestEmailManagerE2E(unittest.TestCase):
         self.db_manager.store_deleted_email.return_value = True
         self.db_manager.archive_saved_email.return_value = True
         self.db_manager.add_processing_history.return_value = True
+        self.db_manager.add_processing_history_bulk.side_effect = len
         self.db_manager.engine = MagicMock()  # Mock the database engine
         self.db_manager.SessionLocal = MagicMock()  # Mock the session factory
         
+        # Batched analysis yields no results by default, so each email falls
+        # back to analyze_email and the per-email flow is exercised
+        self.email_analyzer.analyze_emails.side_effect = lambda emails: [None] * len(emails)
+        
         # Configure gmail service mock
         self.gmail_service.mark_as_read.return_value = True
         self.gmail_service.mark_as_unread.return_value = True
@@ -47,20 +63,19 @@ class TestEmailManagerE2E(unittest.TestCase):
             self.email_analyzer,
             self.db_manager
         )
-        
-        # Sample test data
-        self.test_email = EmailContent(
-            email_id="test123",
-            subject="Test Email",
-            sender="test@example.com",
-            content="This is a test email content",
-            received_date=datetime.now(pytz.UTC)
-        )
+    
+    def recorded_history(self):
+        """Return all processing history records written in bulk."""
+        return [
+            record
+            for call in self.db_manager.add_processing_history_bulk.call_args_list
+            for record in call.args[0]
+        ]
     
     def test_non_essential_email_flow(self):
         """Test complete flow for non-essential email processing."""
         # Setup mock returns
-        self.gmail_service.get_unread_emails.return_value = [self.test_email]
+        self.gmail_service.get_unread_emails.return_value = [self.TEST_EMAIL]
         self.email_analyzer.analyze_email.return_value = EmailAnalysis(
             category=EmailCategory.NON_ESSENTIAL,
             confidence=0.95,
@@ -73,10 +88,10 @@ class TestEmailManagerE2E(unittest.TestCase):
         
         # Verify flow
         self.gmail_service.get_unread_emails.assert_called_once()
-        self.email_analyzer.analyze_email.assert_called_once_with(self.test_email)
+        self.email_analyzer.analyze_email.assert_called_once_with(self.TEST_EMAIL)
         self.db_manager.store_deleted_email.assert_called_once()
-        self.gmail_service.move_to_trash.assert_called_once_with(self.test_email.email_id)
-        self.db_manager.add_processing_history.assert_called_once()
+        self.gmail_service.move_to_trash.assert_called_once_with(self.TEST_EMAIL.email_id)
+        self.assertEqual(len(self.recorded_history()), 1)
     
     def test_save_and_summarize_email_flow(self):
         """Test complete flow for emails that should be saved and summarized."""
@@ -86,7 +101,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Project Update",
             sender="test@example.com",
             content="Project content",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Configure Gmail service to return our test email
@@ -101,9 +116,6 @@ class TestEmailManagerE2E(unittest.TestCase):
         )
         self.email_analyzer.analyze_email.return_value = analysis
         
-        # Configure successful summary generation
-        self.email_analyzer.generate_summary.return_value = analysis.summary
-        
         # Configure successful database operations
         self.db_manager.archive_saved_email.return_value = True
         
@@ -113,8 +125,8 @@ class TestEmailManagerE2E(unittest.TestCase):
         # Verify analysis was performed
         self.email_analyzer.analyze_email.assert_called_once_with(test_email)
         
-        # Verify summary was generated
-        self.email_analyzer.generate_summary.assert_called_once_with(test_email)
+        # Verify the summary from the analysis was used without a second request
+        self.email_analyzer.generate_summary.assert_not_called()
         
         # Verify content was archived
         self.db_manager.archive_saved_email.assert_called_once_with(
@@ -130,15 +142,15 @@ class TestEmailManagerE2E(unittest.TestCase):
         # Verify email was moved to trash after archiving
         self.gmail_service.move_to_trash.assert_called_once_with(test_email.email_id)
         
-        # Verify processing history was recorded
-        self.db_manager.add_processing_history.assert_called_with(
+        # Verify processing history was recorded in a single bulk insert
+        self.db_manager.add_processing_history_bulk.assert_called_once_with([dict(
             email_id=test_email.email_id,
             action="processed",
             category=analysis.category,
             confidence=analysis.confidence,
             success=True,
             reasoning=analysis.reasoning
-        )
+        )])
     
     def test_important_email_flow(self):
         """Test complete flow for important email processing."""
@@ -148,7 +160,7 @@ class TestEmailManagerE2E(unittest.TestCase):
         self.db_manager.reset_mock()
         
         # Setup mock returns
-        self.gmail_service.get_unread_emails.return_value = [self.test_email]
+        self.gmail_service.get_unread_emails.return_value = [self.TEST_EMAIL]
         self.email_analyzer.analyze_email.return_value = EmailAnalysis(
             category=EmailCategory.IMPORTANT,
             confidence=0.85,
@@ -161,9 +173,9 @@ class TestEmailManagerE2E(unittest.TestCase):
         
         # Verify flow
         self.gmail_service.get_unread_emails.assert_called_once()
-        self.email_analyzer.analyze_email.assert_called_once_with(self.test_email)
-        self.gmail_service.mark_as_read.assert_called_once_with(self.test_email.email_id)
-        self.db_manager.add_processing_history.assert_called_once()
+        self.email_analyzer.analyze_email.assert_called_once_with(self.TEST_EMAIL)
+        self.gmail_service.mark_as_read.assert_called_once_with(self.TEST_EMAIL.email_id)
+        self.assertEqual(len(self.recorded_history()), 1)
         
         # Verify that move_to_trash was NOT called
         self.gmail_service.move_to_trash.assert_not_called()
@@ -176,7 +188,7 @@ class TestEmailManagerE2E(unittest.TestCase):
         self.db_manager.reset_mock()
         
         # Setup mock to fail twice then succeed
-        self.gmail_service.get_unread_emails.return_value = [self.test_email]
+        self.gmail_service.get_unread_emails.return_value = [self.TEST_EMAIL]
         self.email_analyzer.analyze_email.side_effect = [
             Exception("API Error 1"),  # First call fails
             Exception("API Error 2"),  # Second call fails
@@ -200,8 +212,8 @@ class TestEmailManagerE2E(unittest.TestCase):
         self.assertTrue(any("API Error 2" in msg for msg in log.output))
         
         # Verify final successful processing
-        self.gmail_service.mark_as_read.assert_called_once_with(self.test_email.email_id)
-        self.db_manager.add_processing_history.assert_called_once()
+        self.gmail_service.mark_as_read.assert_called_once_with(self.TEST_EMAIL.email_id)
+        self.assertEqual(len(self.recorded_history()), 1)
         
         # Verify that move_to_trash was NOT called (since it's an important email)
         self.gmail_service.move_to_trash.assert_not_called()
@@ -219,7 +231,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Special Offer!",
             sender="marketing@example.com",
             content="Limited time offer!",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         save_and_summarize_email = EmailContent(
@@ -227,7 +239,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Project Update",
             sender="test@example.com",
             content="Project content",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         important_email = EmailContent(
@@ -235,7 +247,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Project Status",
             sender="boss@example.com",
             content="Important project update",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Setup mock returns
@@ -279,17 +291,58 @@ class TestEmailManagerE2E(unittest.TestCase):
         
         # Verify non-essential email processing
         self.db_manager.store_deleted_email.assert_called_once()
-        self.gmail_service.move_to_trash.assert_any_call("ad123")
         
         # Verify save and summarize email processing
         self.db_manager.archive_saved_email.assert_called_once()
-        self.gmail_service.move_to_trash.assert_any_call("save456")
+        
+        # Both are trashed with one bulk call, in batch order
+        self.gmail_service.trash_many.assert_called_once_with(["ad123", "save456"])
+        self.gmail_service.move_to_trash.assert_not_called()
         
         # Verify important email processing
         self.gmail_service.mark_as_read.assert_called_once_with("imp789")
         
         # Verify logging for all emails
-        self.assertEqual(self.db_manager.add_processing_history.call_count, 3)
+        self.assertEqual(len(self.recorded_history()), 3)
+
+    def test_batched_analysis_is_used(self):
+        """Test that results from the batched analysis skip per-email analysis."""
+        important_email = EmailContent(
+            email_id="imp789",
+            subject="Project Status",
+            sender="boss@example.com",
+            content="Important project update",
+            received_date=self.RECEIVED_DATE
+        )
+        non_essential_email = EmailContent(
+            email_id="ad123",
+            subject="Special Offer!",
+            sender="marketing@example.com",
+            content="Limited time offer!",
+            received_date=self.RECEIVED_DATE
+        )
+        self.gmail_service.get_unread_emails.return_value = [important_email, non_essential_email]
+        self.email_analyzer.analyze_emails.side_effect = None
+        self.email_analyzer.analyze_emails.return_value = [
+            EmailAnalysis(
+                category=EmailCategory.IMPORTANT,
+                confidence=0.9,
+                reasoning="Important content detected"
+            ),
+            None  # Missing from the batched response
+        ]
+        self.email_analyzer.analyze_email.return_value = EmailAnalysis(
+            category=EmailCategory.NON_ESSENTIAL,
+            confidence=0.95,
+            reasoning="Advertisement detected"
+        )
+        
+        self.email_manager.process_unread_emails(batch_size=2)
+        
+        self.email_analyzer.analyze_emails.assert_called_once_with([important_email, non_essential_email])
+        self.email_analyzer.analyze_email.assert_called_once_with(non_essential_email)
+        self.gmail_service.mark_as_read.assert_called_once_with("imp789")
+        self.gmail_service.move_to_trash.assert_called_once_with("ad123")
 
     def test_edge_cases(self):
         """Test edge cases and boundary conditions."""
@@ -304,7 +357,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="",
             sender="test@example.com",
             content="",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Test case 2: Very large email content
@@ -313,7 +366,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Large Email" * 100,  # Long subject
             sender="test@example.com",
             content="Large content " * 10000,  # ~100KB of content
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Test case 3: Special characters in email
@@ -322,7 +375,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject=" Special Characters Test ",
             sender="test@example.com",
             content="Special chars: , , , , , , ",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Test case 4: Invalid format but processable
@@ -331,7 +384,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject=None,  # Invalid subject
             sender="invalid-email-format",  # Invalid sender format
             content=123,  # Wrong type for content
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         test_emails = [empty_email, large_email, special_chars_email, invalid_email]
@@ -377,21 +430,17 @@ class TestEmailManagerE2E(unittest.TestCase):
         # Verify all emails were processed
         self.assertEqual(self.email_analyzer.analyze_email.call_count, 4)
         
-        # Verify empty email was handled
-        self.gmail_service.move_to_trash.assert_any_call("empty123")
-        
         # Verify large email was processed and stored
         self.db_manager.archive_saved_email.assert_called_once()
-        self.gmail_service.move_to_trash.assert_any_call("large456")
         
         # Verify special characters email was marked as important
         self.gmail_service.mark_as_read.assert_called_once_with("special789")
         
-        # Verify invalid email was moved to trash
-        self.gmail_service.move_to_trash.assert_any_call("invalid101")
+        # Verify the empty, large and invalid emails were moved to trash
+        self.gmail_service.trash_many.assert_called_once_with(["empty123", "large456", "invalid101"])
         
         # Verify all emails were logged
-        self.assertEqual(self.db_manager.add_processing_history.call_count, 4)
+        self.assertEqual(len(self.recorded_history()), 4)
 
     def test_max_retries_exceeded(self):
         """Test behavior when maximum retries are exceeded.
@@ -408,7 +457,7 @@ class TestEmailManagerE2E(unittest.TestCase):
             subject="Test Email",
             sender="test@example.com",
             content="Test content",
-            received_date=datetime.now(pytz.UTC)
+            received_date=self.RECEIVED_DATE
         )
         
         # Configure mocks
@@ -426,8 +475,8 @@ class TestEmailManagerE2E(unittest.TestCase):
         # Verify retry behavior
         self.assertEqual(self.email_analyzer.analyze_email.call_count, 2)
         
-        # Verify failure logging
-        self.db_manager.add_processing_history.assert_called_with(
+        # Verify failure logging, flushed even though the batch failed
+        self.assertEqual(self.recorded_history(), [dict(
             email_id=test_email.email_id,
             action="failed",
             category=EmailCategory.IMPORTANT,
@@ -435,12 +484,12 @@ class TestEmailManagerE2E(unittest.TestCase):
             success=False,
             error_message="Persistent error",
             reasoning="Failed to process email"
-        )
+        )])
 
     def test_database_failures(self):
         """Test handling of database connection failures."""
         # Configure test data
-        self.gmail_service.get_unread_emails.return_value = [self.test_email]
+        self.gmail_service.get_unread_emails.return_value = [self.TEST_EMAIL]
         self.email_analyzer.analyze_email.return_value = EmailAnalysis(
             category=EmailCategory.SAVE_AND_SUMMARIZE,
             confidence=0.90,
@@ -517,7 +566,7 @@ class TestEmailManagerE2E(unittest.TestCase):
                 subject=f"Test {i}",
                 sender="test@example.com",
                 content=f"Content {i}",
-                received_date=datetime.now(pytz.UTC)
+                received_date=self.RECEIVED_DATE
             ) for i in range(3)
         ]
         
@@ -540,16 +589,14 @@ class TestEmailManagerE2E(unittest.TestCase):
         # Verify all emails were processed
         self.assertEqual(self.email_analyzer.analyze_email.call_count, 3)
         
-        # Verify proper cleanup
-        self.assertEqual(self.gmail_service.move_to_trash.call_count, 3)
+        # Verify proper cleanup, trashing the batch with one call
+        self.gmail_service.trash_many.assert_called_once_with([email.email_id for email in test_emails])
+        self.gmail_service.move_to_trash.assert_not_called()
         self.assertEqual(self.db_manager.store_deleted_email.call_count, 3)
-        self.assertEqual(self.db_manager.add_processing_history.call_count, 3)
+        self.assertEqual(len(self.recorded_history()), 3)
         
         # Verify each email was properly handled
         for email in test_emails:
-            # Verify email was moved to trash
-            self.gmail_service.move_to_trash.assert_any_call(email.email_id)
-            
             # Verify email was stored in database
             self.db_manager.store_deleted_email.assert_any_call(
                 email_id=email.email_id,
@@ -559,14 +606,63 @@ class TestEmailManagerE2E(unittest.TestCase):
             )
             
             # Verify processing history was added
-            self.db_manager.add_processing_history.assert_any_call(
+            self.assertIn(dict(
                 email_id=email.email_id,
                 action="processed",
                 category=analysis.category,
                 confidence=analysis.confidence,
                 success=True,
                 reasoning=analysis.reasoning
-            )
+            ), self.recorded_history())
+
+    def test_process_all_unread_emails(self):
+        """Test that every prefetched batch is processed until Gmail runs out."""
+        batches = [
+            [EmailContent(
+                email_id=f"page{page}_{i}",
+                subject=f"Test Email {i}",
+                sender="test@example.com",
+                content=f"Content {i}",
+                received_date=self.RECEIVED_DATE
+            ) for i in range(2)]
+            for page in range(3)
+        ]
+        self.gmail_service.iter_unread_batches.return_value = iter(batches)
+        self.email_analyzer.analyze_email.return_value = EmailAnalysis(
+            category=EmailCategory.IMPORTANT,
+            confidence=0.9,
+            reasoning="Important content",
+            summary=None
+        )
+
+        processed = self.email_manager.process_all_unread_emails(batch_size=2)
+
+        self.assertEqual(processed, 6)
+        self.gmail_service.iter_unread_batches.assert_called_once_with(2)
+        self.assertEqual(
+            [call.args[0] for call in self.gmail_service.mark_many_as_read.call_args_list],
+            [[email.email_id for email in batch] for batch in batches]
+        )
+        self.assertEqual(len(self.recorded_history()), 6)
+
+    def test_process_all_unread_emails_fetch_failure(self):
+        """Test that a failed prefetch stops processing with an EmailProcessingError."""
+        def failing_batches(batch_size):
+            yield [self.TEST_EMAIL]
+            raise Exception("Gmail unavailable")
+        self.gmail_service.iter_unread_batches.side_effect = failing_batches
+        self.email_analyzer.analyze_email.return_value = EmailAnalysis(
+            category=EmailCategory.IMPORTANT,
+            confidence=0.9,
+            reasoning="Important content",
+            summary=None
+        )
+
+        with self.assertRaises(EmailProcessingError) as context:
+            self.email_manager.process_all_unread_emails(batch_size=1)
+
+        self.assertIn("Gmail unavailable", str(context.exception))
+        self.gmail_service.mark_as_read.assert_called_once_with(self.TEST_EMAIL.email_id)
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,12 +1,82 @@
+import asyncio
+import stat
+import tempfile
+import threading
 import unittest
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
+import httpx
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
 
-from ..gmail.service import GmailService
+from ..config import GmailConfig, config
+from ..gmail.auth import GmailAuthenticator, OrjsonModel
+from ..gmail.service import MESSAGE_FIELDS, GmailService, _extract_headers
 from ..models import EmailContent
 
+def _split_fields(fields):
+    """Split a fields mask on the commas outside parentheses"""
+    selectors, depth, start = [], 0, 0
+    for index, char in enumerate(fields):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(fields[start:index])
+            start = index + 1
+    selectors.append(fields[start:])
+    return selectors
+
+def apply_fields(resource, fields):
+    """Trim a resource to a partial response fields mask, the way Gmail does"""
+    if isinstance(resource, list):
+        return [apply_fields(item, fields) for item in resource]
+    trimmed = {}
+    for selector in _split_fields(fields):
+        paren, slash = selector.find('('), selector.find('/')
+        if paren != -1 and (slash == -1 or paren < slash):
+            name, sub_fields = selector[:paren], selector[paren + 1:-1]
+        elif slash != -1:
+            name, sub_fields = selector[:slash], selector[slash + 1:]
+        else:
+            name, sub_fields = selector, None
+        if name not in resource:
+            continue
+        if sub_fields is None:
+            trimmed[name] = resource[name]
+        elif isinstance(resource[name], list):
+            trimmed[name] = apply_fields(resource[name], sub_fields)
+        else:
+            trimmed.setdefault(name, {}).update(apply_fields(resource[name], sub_fields))
+    return trimmed
+
+# Stands in for the environment's Gmail settings, so tests that build a real
+# GmailAuthenticator don't need GMAIL_CREDENTIALS_FILE
+TEST_GMAIL_CONFIG = GmailConfig(
+    credentials_file='credentials.json',
+    token_file='token.json',
+    user_email='test@example.com'
+)
+
+class FakeBatch:
+    """Stands in for BatchHttpRequest, answering each added request from responses"""
+
+    def __init__(self, responses, callback):
+        self.responses = responses
+        self.callback = callback
+        self.request_ids = []
+
+    def add(self, request, request_id):
+        self.request_ids.append(request_id)
+
+    def execute(self):
+        for request_id in self.request_ids:
+            self.callback(request_id, self.responses[request_id], None)
+
 class TestGmailService(unittest.TestCase):
     """Test cases for GmailService class"""
 
@@ -15,14 +85,8 @@ class TestGmailService(unittest.TestCase):
         # Create a mock Gmail service
         self.mock_service = MagicMock()
         
-        # Patch the GmailAuthenticator to return our mock service
-        patcher = patch('email_manager.gmail.service.GmailAuthenticator')
-        self.mock_auth = patcher.start()
-        self.mock_auth.return_value.get_gmail_service.return_value = self.mock_service
-        self.addCleanup(patcher.stop)
-        
-        # Create GmailService instance
-        self.gmail_service = GmailService()
+        # Create GmailService instance around it, skipping authentication
+        self.gmail_service = GmailService(service=self.mock_service)
 
     def test_get_unread_emails(self):
         """Test retrieving unread emails"""
@@ -62,19 +126,32 @@ class TestGmailService(unittest.TestCase):
 
         # Configure mock responses
         self.mock_service.users().messages().list().execute.return_value = mock_messages
-        self.mock_service.users().messages().get().execute.side_effect = [mock_email_1, mock_email_2]
+        batches = []
+        def new_batch(callback):
+            batch = FakeBatch({'123': mock_email_1, '456': mock_email_2}, callback)
+            batches.append(batch)
+            return batch
+        self.mock_service.new_batch_http_request.side_effect = new_batch
 
         # Call the method
         emails = self.gmail_service.get_unread_emails(max_results=2)
 
         # Verify results
         self.assertEqual(len(emails), 2)
+        self.assertEqual([batch.request_ids for batch in batches], [['123', '456']])
+        self.mock_service.users().messages().list.assert_called_with(
+            userId='me',
+            labelIds=['UNREAD', 'INBOX'],
+            maxResults=2,
+            fields='messages/id,nextPageToken'
+        )
         
         # Check first email
         self.assertEqual(emails[0].email_id, '123')
         self.assertEqual(emails[0].subject, 'Test Email 1')
         self.assertEqual(emails[0].sender, 'sender1@example.com')
         self.assertEqual(emails[0].content, 'Test Content 1')
+        self.assertEqual(emails[0].received_date, datetime(2023, 12, 26, 16, 0, tzinfo=timezone.utc))
         
         # Check second email
         self.assertEqual(emails[1].email_id, '456')
@@ -82,6 +159,193 @@ class TestGmailService(unittest.TestCase):
         self.assertEqual(emails[1].sender, 'sender2@example.com')
         self.assertEqual(emails[1].content, 'Test Content 2')
 
+    def test_get_unread_emails_async(self):
+        """Test fetching unread emails with concurrent REST requests"""
+        credentials = MagicMock(valid=False, token='access-token')
+        credentials.refresh.side_effect = lambda request: setattr(credentials, 'valid', True)
+        self.gmail_service = GmailService(service=self.mock_service, credentials=credentials)
+        bodies = {
+            '123': 'VGVzdCBDb250ZW50IDE=',  # "Test Content 1" in base64
+            '456': 'VGVzdCBDb250ZW50IDI='   # "Test Content 2" in base64
+        }
+
+        def handler(request):
+            self.assertEqual(request.headers['Authorization'], 'Bearer access-token')
+            message_id = request.url.path.rsplit('/', 1)[-1]
+            if message_id == 'messages':
+                self.assertEqual(request.url.params.get_list('labelIds'), ['UNREAD', 'INBOX'])
+                return httpx.Response(200, json={'messages': [{'id': '123'}, {'id': '456'}]})
+            return httpx.Response(200, json={
+                'id': message_id,
+                'internalDate': '1703606400000',
+                'payload': {
+                    'headers': [{'name': 'Subject', 'value': f'Email {message_id}'}],
+                    'body': {'data': bodies[message_id]}
+                }
+            })
+
+        async def run():
+            self.gmail_service._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await self.gmail_service.get_unread_emails_async(max_results=2)
+            finally:
+                await self.gmail_service.aclose()
+
+        emails = asyncio.run(run())
+
+        self.assertEqual([email.email_id for email in emails], ['123', '456'])
+        self.assertEqual(emails[1].subject, 'Email 456')
+        self.assertEqual(emails[1].content, 'Test Content 2')
+        credentials.refresh.assert_called_once()
+
+    @patch('email_manager.gmail.service.asyncio.sleep', new_callable=AsyncMock)
+    def test_get_unread_emails_async_retries_rate_limits(self, mock_sleep):
+        """Test that the async fetch waits for Retry-After on 429 responses"""
+        credentials = MagicMock(valid=True, token='access-token')
+        self.gmail_service = GmailService(service=self.mock_service, credentials=credentials)
+        attempts = []
+
+        def handler(request):
+            message_id = request.url.path.rsplit('/', 1)[-1]
+            attempts.append(message_id)
+            if message_id == 'messages':
+                return httpx.Response(200, json={'messages': [{'id': '123'}]})
+            if attempts.count(message_id) == 1:
+                return httpx.Response(429, headers={'Retry-After': '2'})
+            return httpx.Response(200, json={
+                'id': message_id,
+                'internalDate': '1703606400000',
+                'payload': {'headers': [], 'body': {'data': 'VGVzdCBDb250ZW50IDE='}}
+            })
+
+        async def run():
+            self.gmail_service._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await self.gmail_service.get_unread_emails_async(max_results=1)
+            finally:
+                await self.gmail_service.aclose()
+
+        emails = asyncio.run(run())
+
+        self.assertEqual(emails[0].content, 'Test Content 1')
+        self.assertEqual(attempts, ['messages', '123', '123'])
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    def test_get_unread_emails_excluding_categories(self):
+        """Test that excluded categories are filtered out by Gmail"""
+        self.mock_service.users().messages().list().execute.return_value = {}
+
+        emails = self.gmail_service.get_unread_emails(
+            max_results=5, labels=(), exclude_categories=('promotions', 'social')
+        )
+
+        self.assertEqual(emails, [])
+        self.mock_service.users().messages().list.assert_called_with(
+            userId='me',
+            labelIds=['UNREAD'],
+            maxResults=5,
+            fields='messages/id,nextPageToken',
+            q='-category:promotions -category:social'
+        )
+
+    def test_parse_nested_multipart_message(self):
+        """Test that the first text part of nested multiparts is used"""
+        message = {
+            'id': '789',
+            'internalDate': '1703606400000',
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'headers': [{'name': 'Subject', 'value': 'Nested'}],
+                'parts': [
+                    {
+                        'mimeType': 'multipart/alternative',
+                        'parts': [
+                            {'mimeType': 'text/plain', 'body': {'data': 'SGVsbG8g_w=='}},  # "Hello " + invalid byte
+                            {'mimeType': 'text/html', 'body': {'data': 'PGI+SGk8L2I+'}}
+                        ]
+                    },
+                    {'mimeType': 'text/plain', 'body': {'data': 'bm90ZXMudHh0'}},  # Attached text file
+                    {'mimeType': 'application/pdf', 'body': {}}
+                ]
+            }
+        }
+
+        email = self.gmail_service._parse_message(message)
+
+        self.assertEqual(email.subject, 'Nested')
+        self.assertEqual(email.sender, 'Unknown Sender')
+        self.assertEqual(email.content, 'Hello \ufffd')
+
+    def test_fields_mask_keeps_deeply_nested_text(self):
+        """Test that the partial response still contains text nested three levels deep"""
+        message = {
+            'id': '791',
+            'threadId': 'thread791',
+            'snippet': 'Hello',
+            'internalDate': '1703606400000',
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'headers': [{'name': 'Subject', 'value': 'Deep'}],
+                'parts': [
+                    {
+                        'mimeType': 'multipart/related',
+                        'parts': [
+                            {
+                                'mimeType': 'multipart/alternative',
+                                'parts': [
+                                    {'mimeType': 'text/plain', 'body': {'size': 5, 'data': 'SGVsbG8='}},  # "Hello"
+                                    {'mimeType': 'text/html', 'body': {'size': 8, 'data': 'PGI+SGk8L2I+'}}
+                                ]
+                            },
+                            {'mimeType': 'image/png', 'filename': 'logo.png', 'body': {'attachmentId': 'a1'}}
+                        ]
+                    },
+                    {'mimeType': 'application/pdf', 'filename': 'invoice.pdf', 'body': {'attachmentId': 'a2'}}
+                ]
+            }
+        }
+
+        partial = apply_fields(message, MESSAGE_FIELDS)
+        email = self.gmail_service._parse_message(partial)
+
+        self.assertNotIn('snippet', partial)
+        self.assertEqual(email.subject, 'Deep')
+        self.assertEqual(email.content, 'Hello')
+
+    def test_parse_html_only_message(self):
+        """Test that HTML-only messages fall back to the text of the HTML part"""
+        message = {
+            'id': '790',
+            'internalDate': '1703606400000',
+            'payload': {
+                'mimeType': 'multipart/alternative',
+                'headers': [],
+                'parts': [
+                    # "<style>p {}</style><p>Hi <b>there</b></p>"
+                    {'mimeType': 'text/html', 'body': {'data': 'PHN0eWxlPnAge308L3N0eWxlPjxwPkhpIDxiPnRoZXJlPC9iPjwvcD4='}}
+                ]
+            }
+        }
+
+        email = self.gmail_service._parse_message(message)
+
+        self.assertEqual(email.content, 'Hi there')
+
+    def test_extract_headers(self):
+        """Test picking headers out of a message regardless of case"""
+        headers = [
+            {'name': 'Received', 'value': 'from mx.example.com'},
+            {'name': 'SUBJECT', 'value': 'Test Email'},
+            {'name': 'from', 'value': 'sender@example.com'},
+            {'name': 'Subject', 'value': 'Duplicate'}
+        ]
+
+        self.assertEqual(_extract_headers(headers), {
+            'Subject': 'Test Email',
+            'From': 'sender@example.com'
+        })
+        self.assertEqual(_extract_headers(headers[:1]), {})
+
     def test_mark_as_read(self):
         """Test marking an email as read"""
         email_id = "test123"
@@ -98,6 +362,51 @@ class TestGmailService(unittest.TestCase):
         )
         modify_call().execute.assert_called_once()
 
+    def test_mark_many_as_read(self):
+        """Test marking many emails as read in chunks of 1000"""
+        email_ids = [f"id{index}" for index in range(1500)]
+
+        self.assertTrue(self.gmail_service.mark_many_as_read(email_ids))
+
+        batch_modify = self.mock_service.users().messages().batchModify
+        self.assertEqual(batch_modify.call_count, 2)
+        batch_modify.assert_any_call(
+            userId='me',
+            body={'ids': email_ids[:1000], 'removeLabelIds': ['UNREAD']}
+        )
+        batch_modify.assert_called_with(
+            userId='me',
+            body={'ids': email_ids[1000:], 'removeLabelIds': ['UNREAD']}
+        )
+
+    def test_mark_many_as_read_reports_failed_chunk(self):
+        """Test that a failed chunk is logged with the range of emails it covered"""
+        email_ids = [f"id{index}" for index in range(2500)]
+        self.mock_service.users().messages().batchModify().execute.side_effect = [
+            {}, HttpError(resp=MagicMock(status=400), content=b'Bad Request')
+        ]
+
+        with self.assertLogs('email_manager.gmail.service', level='ERROR') as logs:
+            self.assertFalse(self.gmail_service.mark_many_as_read(email_ids))
+
+        self.assertIn("1001-2000 of 2500", logs.output[0])
+
+    def test_trash_many(self):
+        """Test that trashing many emails reports failures of single emails"""
+        batches = []
+        def new_batch(callback):
+            batch = FakeBatch({'1': {}, '2': {}}, callback)
+            batch.execute = lambda: [
+                callback('1', {}, None),
+                callback('2', None, HttpError(resp=MagicMock(status=404), content=b'Not Found'))
+            ]
+            batches.append(batch)
+            return batch
+        self.mock_service.new_batch_http_request.side_effect = new_batch
+
+        self.assertFalse(self.gmail_service.trash_many(['1', '2']))
+        self.assertEqual([batch.request_ids for batch in batches], [['1', '2']])
+
     def test_move_to_trash(self):
         """Test moving an email to trash"""
         email_id = "test123"
@@ -113,15 +422,149 @@ class TestGmailService(unittest.TestCase):
         )
         trash_call().execute.assert_called_once()
 
-    def test_api_error_handling(self):
+    @patch('email_manager.gmail.service.build_http')
+    @patch('email_manager.gmail.service.AuthorizedHttp')
+    def test_concurrent_requests_use_separate_connections(self, mock_authorized_http, mock_build_http):
+        """Test that requests from several threads run at once, each on its own connection"""
+        mock_authorized_http.side_effect = lambda credentials, http: MagicMock()
+        gmail_service = GmailService(service=self.mock_service, credentials=MagicMock())
+        # Both requests must be in flight together to get past the barrier
+        both_started = threading.Barrier(2, timeout=5)
+        used = []
+        def execute(http):
+            used.append(http)
+            if len(used) <= 2:
+                both_started.wait()
+            return {}
+        requests = [MagicMock(), MagicMock()]
+        for request in requests:
+            request.execute.side_effect = execute
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(gmail_service._execute, requests))
+        gmail_service._execute(requests[0])
+
+        self.assertIsNot(used[0], used[1])
+        # Idle connections are reused rather than opened again
+        self.assertTrue(any(used[2] is http for http in used[:2]))
+        self.assertEqual(mock_authorized_http.call_count, 2)
+
+    @patch.object(config, 'gmail', TEST_GMAIL_CONFIG)
+    @patch.dict('email_manager.gmail.auth._services', clear=True)
+    @patch.object(GmailAuthenticator, '_get_credentials')
+    @patch('email_manager.gmail.auth.build')
+    def test_gmail_resource_is_shared(self, mock_build, mock_get_credentials):
+        """Test that the Gmail resource is built once per process"""
+        first = GmailService()
+        second = GmailService()
+
+        self.assertIs(first.service, second.service)
+        self.assertIs(first.credentials, mock_get_credentials.return_value)
+        mock_get_credentials.assert_called_once()
+        self.assertIsInstance(mock_build.call_args.kwargs['model'], OrjsonModel)
+        mock_build.assert_called_once_with(
+            'gmail', 'v1', credentials=mock_get_credentials.return_value, model=ANY,
+            static_discovery=True, cache_discovery=False
+        )
+
+    @patch('email_manager.gmail.service.time.sleep')
+    def test_rate_limited_request_is_retried(self, mock_sleep):
+        """Test that 429 responses are retried after Retry-After"""
+        rate_limited = HttpError(resp=MagicMock(status=429, get=lambda name: '3'), content=b'Rate Limit')
+        modify = self.mock_service.users().messages().modify
+        modify().execute.side_effect = [rate_limited, {}]
+
+        self.assertTrue(self.gmail_service.mark_as_read("test123"))
+
+        self.assertEqual(modify().execute.call_count, 2)
+        mock_sleep.assert_called_once_with(3.0)
+
+    @patch('email_manager.gmail.service.time.sleep')
+    def test_rate_limited_batch_items_are_retried(self, mock_sleep):
+        """Test that only the throttled messages of a batch are fetched again"""
+        message = {
+            'id': '123',
+            'internalDate': '1703606400000',
+            'payload': {'headers': [], 'body': {'data': 'VGVzdCBDb250ZW50IDE='}}
+        }
+        rate_limited = HttpError(resp=MagicMock(status=429, get=lambda name: '2'), content=b'Rate Limit')
+        batches = []
+        def new_batch(callback):
+            batch = FakeBatch({}, callback)
+            def execute():
+                for request_id in batch.request_ids:
+                    if len(batches) == 1 and request_id == '456':
+                        callback(request_id, None, rate_limited)
+                    else:
+                        callback(request_id, dict(message, id=request_id), None)
+            batch.execute = execute
+            batches.append(batch)
+            return batch
+        self.mock_service.new_batch_http_request.side_effect = new_batch
+
+        messages = self.gmail_service._get_messages(['123', '456'])
+
+        self.assertEqual([message['id'] for message in messages], ['123', '456'])
+        self.assertEqual([batch.request_ids for batch in batches], [['123', '456'], ['456']])
+        mock_sleep.assert_called_once_with(2.0)
+
+    @patch('email_manager.gmail.service.time.sleep')
+    def test_client_errors_are_not_retried(self, mock_sleep):
+        """Test that errors other than rate limits and server errors fail at once"""
+        not_found = HttpError(resp=MagicMock(status=404), content=b'Not Found')
+        trash = self.mock_service.users().messages().trash
+        trash().execute.side_effect = not_found
+
+        self.assertFalse(self.gmail_service.move_to_trash("test123"))
+
+        trash().execute.assert_called_once()
+        mock_sleep.assert_not_called()
+
+    @patch('email_manager.gmail.service.time.sleep')
+    def test_api_error_handling(self, mock_sleep):
         """Test handling of API errors"""
         # Mock an API error
         self.mock_service.users().messages().list().execute.side_effect = \
             HttpError(resp=MagicMock(status=500), content=b'API Error')
         
-        # Verify error handling
+        # Verify error handling, after retrying the server error
         with self.assertRaises(HttpError):
             self.gmail_service.get_unread_emails()
+        self.assertEqual(self.mock_service.users().messages().list().execute.call_count, 6)
+
+class TestOrjsonModel(unittest.TestCase):
+    """Test cases for the orjson response model"""
+
+    def test_deserialize(self):
+        """Test that responses parse the same as with the stdlib model"""
+        content = b'{"id": "123", "payload": {"headers": [{"name": "Subject", "value": "Caf\xc3\xa9"}]}}'
+
+        self.assertEqual(OrjsonModel().deserialize(content), JsonModel().deserialize(content))
+        self.assertEqual(OrjsonModel(data_wrapper=True).deserialize(b'{"data": {"id": "1"}}'), {'id': '1'})
+
+class TestGmailAuthenticator(unittest.TestCase):
+    """Test cases for GmailAuthenticator token handling"""
+
+    def setUp(self):
+        """Point the authenticator at a temporary token file"""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        with patch.object(config, 'gmail', TEST_GMAIL_CONFIG):
+            self.authenticator = GmailAuthenticator()
+        self.authenticator.token_file = Path(tmp_dir.name) / 'token.json'
+
+    def test_save_credentials_replaces_token_atomically(self):
+        """Test that the token is written in full with owner-only permissions"""
+        self.authenticator.token_file.write_text('{"old": true}')
+        creds = MagicMock()
+        creds.to_json.return_value = '{"token": "new"}'
+
+        self.authenticator._save_credentials(creds)
+
+        token_file = self.authenticator.token_file
+        self.assertEqual(token_file.read_text(), '{"token": "new"}')
+        self.assertEqual(stat.S_IMODE(token_file.stat().st_mode), 0o600)
+        self.assertEqual([path.name for path in token_file.parent.iterdir()], ['token.json'])
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,25 +1,23 @@
 -- Initialize Email Manager Database
 
+-- Fail fast instead of queueing behind (and blocking) a running manager's writes.
+-- LOCAL so the timeout ends with the script's transaction instead of staying on
+-- the pooled connection that ran it.
+SET LOCAL lock_timeout = '2s';
+
 -- Drop existing tables and types
 DROP TABLE IF EXISTS processing_history CASCADE;
 DROP TABLE IF EXISTS saved_emails CASCADE;
 DROP TABLE IF EXISTS deleted_emails CASCADE;
-DROP TYPE IF EXISTS emailcategory CASCADE;
-
--- Enable UUID extension
-CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+DROP TABLE IF EXISTS analysis_cache CASCADE;
+DROP TYPE IF EXISTS emailcategory CASCADE;  -- Categories used to be an enum type
 
--- Create email category enum if it doesn't exist
-DO $$ 
-BEGIN
-    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'emailcategory') THEN
-        CREATE TYPE emailcategory AS ENUM ('SAVE_AND_SUMMARIZE', 'NON_ESSENTIAL', 'IMPORTANT');
-    END IF;
-END $$;
+-- gen_random_uuid() is built in from PostgreSQL 13; pgcrypto provides it on 12
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
 
 -- Deleted Emails Table
 CREATE TABLE IF NOT EXISTS deleted_emails (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     email_id VARCHAR(255) UNIQUE NOT NULL,
     subject TEXT NOT NULL,
     sender VARCHAR(255) NOT NULL,
@@ -29,43 +27,119 @@ CREATE TABLE IF NOT EXISTS deleted_emails (
 
 -- Saved Emails Archive
 CREATE TABLE IF NOT EXISTS saved_emails (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     email_id VARCHAR(255) UNIQUE NOT NULL,
     subject TEXT NOT NULL,
     sender VARCHAR(255) NOT NULL,
     content TEXT NOT NULL,
     summary TEXT NOT NULL,
     received_date TIMESTAMP WITH TIME ZONE NOT NULL,
-    category emailcategory NOT NULL,
+    category SMALLINT NOT NULL CHECK (category BETWEEN 1 AND 3),  -- 1 save_and_summarize, 2 non_essential, 3 important
     archived_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- Processing History Table (for tracking and analysis)
+-- Append-only, so it is partitioned by month to keep the recent, frequently read
+-- part small and let old months be vacuumed, detached or dropped cheaply
 CREATE TABLE IF NOT EXISTS processing_history (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     email_id VARCHAR(255) NOT NULL,
-    processing_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    processing_date TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     action VARCHAR(50) NOT NULL,  -- 'deleted', 'archived', 'marked_read'
-    category emailcategory NOT NULL,
+    category SMALLINT NOT NULL CHECK (category BETWEEN 1 AND 3),  -- 1 save_and_summarize, 2 non_essential, 3 important
     confidence FLOAT NOT NULL DEFAULT 0.0,  -- Confidence score from analysis
     success BOOLEAN NOT NULL,
     error_message TEXT,  -- For storing error details
-    reasoning TEXT  -- For storing analyzer reasoning
+    reasoning TEXT,  -- For storing analyzer reasoning
+    PRIMARY KEY (id, processing_date)  -- Must include the partition key
+) PARTITION BY RANGE (processing_date);
+
+-- Catches rows outside the monthly partitions so inserts never fail
+CREATE TABLE IF NOT EXISTS processing_history_default PARTITION OF processing_history DEFAULT;
+
+-- Creates the partitions for the current month and the next months_ahead months.
+-- A month whose rows already landed in the default partition can't get its own
+-- partition while the default is attached, so the default is detached, the
+-- month's rows are moved into the new partition and the default is reattached.
+CREATE OR REPLACE FUNCTION ensure_processing_history_partitions(months_ahead INT DEFAULT 3) RETURNS void AS $$
+DECLARE
+    month_start DATE;
+    month_end DATE;
+    partition_name TEXT;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::date;
+        month_end := (month_start + interval '1 month')::date;
+        partition_name := 'processing_history_' || to_char(month_start, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(quote_ident(partition_name)) IS NOT NULL;
+
+        IF EXISTS (
+            SELECT 1 FROM processing_history_default
+            WHERE processing_date >= month_start AND processing_date < month_end
+        ) THEN
+            ALTER TABLE processing_history DETACH PARTITION processing_history_default;
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF processing_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+            WITH moved AS (
+                DELETE FROM processing_history_default
+                WHERE processing_date >= month_start AND processing_date < month_end
+                RETURNING *
+            )
+            INSERT INTO processing_history SELECT * FROM moved;
+            ALTER TABLE processing_history ATTACH PARTITION processing_history_default DEFAULT;
+        ELSE
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF processing_history FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end
+            );
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_processing_history_partitions();
+
+-- Analysis Cache (Claude results for previously seen emails)
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    key VARCHAR(32) PRIMARY KEY,  -- blake2b digest of model, sender, subject and content
+    category SMALLINT NOT NULL CHECK (category BETWEEN 1 AND 3),  -- 1 save_and_summarize, 2 non_essential, 3 important
+    confidence FLOAT NOT NULL,
+    reasoning TEXT,
+    summary TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Compress email bodies with lz4 instead of the default pglz; it compresses
+-- and decompresses TOASTed values several times faster. Needs PostgreSQL 14+
+-- built with lz4, otherwise the default compression is kept.
+DO $$
+BEGIN
+    IF current_setting('server_version_num')::int >= 140000 THEN
+        ALTER TABLE saved_emails ALTER COLUMN content SET COMPRESSION lz4;
+        ALTER TABLE deleted_emails ALTER COLUMN content SET COMPRESSION lz4;
+    END IF;
+EXCEPTION WHEN feature_not_supported THEN
+    RAISE NOTICE 'lz4 compression is not available, keeping pglz';
+END $$;
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_deleted_emails_email_id ON deleted_emails(email_id);
 CREATE INDEX IF NOT EXISTS idx_saved_emails_email_id ON saved_emails(email_id);
-CREATE INDEX IF NOT EXISTS idx_processing_history_email_id ON processing_history(email_id);
+-- Covers lookups by email_id and returns each email's history already in date order
+CREATE INDEX IF NOT EXISTS idx_processing_history_email_id_date ON processing_history(email_id, processing_date);
 CREATE INDEX IF NOT EXISTS idx_saved_emails_category ON saved_emails(category);
 CREATE INDEX IF NOT EXISTS idx_deleted_emails_deletion_date ON deleted_emails(deletion_date);
 CREATE INDEX IF NOT EXISTS idx_saved_emails_received_date ON saved_emails(received_date);
 CREATE INDEX IF NOT EXISTS idx_processing_history_date ON processing_history(processing_date);
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_created_at ON analysis_cache(created_at);
 
 -- Add helpful table descriptions
 COMMENT ON TABLE deleted_emails IS 'Stores metadata for emails that have been moved to trash';
 COMMENT ON TABLE saved_emails IS 'Archives important emails with summaries based on user preferences';
 COMMENT ON TABLE processing_history IS 'Tracks all email processing operations for analysis and debugging';
+COMMENT ON TABLE analysis_cache IS 'Caches Claude analysis results so repeated emails skip the API';
 
 -- Grant necessary permissions
 GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO current_user;
\ No newline at end of file